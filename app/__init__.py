@@ -1,21 +1,61 @@
+import time
+_import_started = time.perf_counter()
 
 from flask import Flask
 from .models import db
-from .extensions import ma
+from .extensions import ma, cache
+from .migrations import upgrade_command
+from .seed import seed_command
+from .utils.auth import init_auth
+from .utils.passwords import hasher
+from .utils.log import configure_logging
+from .utils.metrics import metrics
+from .utils.db import configure_engine_options, install_sqlite_pragmas, replica_router
+from .utils.json_provider import FastJSONProvider
+from .utils.timing import server_timing
+from .utils.profiling import profiler
+from .utils.slow_queries import slow_queries
+_blueprints_started = time.perf_counter()
 from .blueprints.users import users_bp
 from .blueprints.pastor_messages import pastor_messages_bp
+from .blueprints.diagnostics import diagnostics_bp
+_imports_finished = time.perf_counter()
+
 
 def create_app(config_name):
+    started = time.perf_counter()
     
     app = Flask(__name__)
     app.config.from_object(f'config.{config_name}')
+    app.json = FastJSONProvider(app)
+    configure_logging(app)
 
+    configure_engine_options(app)
     db.init_app(app)
+    replica_router.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(app, db.engines.values())
+        server_timing.init_app(app, db.engines.values())
+        slow_queries.init_app(app, db.engines.values())
     ma.init_app(app)
+    cache.init_app(app)
+    app.cli.add_command(upgrade_command)
+    app.cli.add_command(seed_command)
+    init_auth(app)
+    hasher.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
 
     
    
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(pastor_messages_bp, url_prefix='/pastor-messages')
+    app.register_blueprint(diagnostics_bp, url_prefix='/diagnostics')
 
+    # Startup instrumentation; flask_app.py adds the schema check and logs it.
+    app.extensions['startup_timings'] = {
+        "package_import_ms": round((_imports_finished - _import_started) * 1000, 1),
+        "blueprint_import_ms": round((_imports_finished - _blueprints_started) * 1000, 1),
+        "create_app_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
     return app
\ No newline at end of file
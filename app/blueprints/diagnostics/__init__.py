@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+diagnostics_bp = Blueprint('diagnostics', __name__)
+
+from . import routes
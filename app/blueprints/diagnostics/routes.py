@@ -0,0 +1,68 @@
+from flask import request, jsonify, send_file
+from app.utils.auth import admin_required
+from app.utils.profiling import profiler
+from app.utils.slow_queries import slow_queries
+from . import diagnostics_bp
+
+
+@diagnostics_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Recent request profiles grouped per endpoint, with their merged hot spots (admin only)"""
+    endpoint = request.args.get('endpoint')
+    per_endpoint = request.args.get('limit', 20, type=int)
+    if per_endpoint < 1:
+        return jsonify({"message": "'limit' must be at least 1."}), 400
+
+    groups = {}
+    for entry in profiler.list_files():
+        if endpoint and entry['endpoint'] != endpoint:
+            continue
+        group = groups.setdefault(entry['endpoint'], [])
+        if len(group) < per_endpoint:
+            group.append(entry)
+
+    result = []
+    for name, entries in groups.items():
+        elapsed = [e['elapsed_ms'] for e in entries]
+        result.append({
+            "endpoint": name,
+            "profiles": len(entries),
+            "mean_ms": round(sum(elapsed) / len(elapsed), 1),
+            "max_ms": max(elapsed),
+            "files": [e['name'] for e in entries],
+            "top": profiler.aggregate(entries),
+        })
+    result.sort(key=lambda g: g['max_ms'], reverse=True)
+    return jsonify(result), 200
+
+
+@diagnostics_bp.route('/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download one raw pstats file, e.g. for snakeviz (admin only)"""
+    for entry in profiler.list_files():
+        if entry['name'] == name:
+            return send_file(entry['path'], mimetype='application/octet-stream', as_attachment=True)
+    return jsonify({"message": "Profile not found."}), 404
+
+
+@diagnostics_bp.route('/slow-queries', methods=['GET'])
+@admin_required
+def list_slow_queries():
+    """Recent slow statements with their plans, newest first (admin only)"""
+    endpoint = request.args.get('endpoint')
+    min_ms = request.args.get('min_ms', 0, type=float)
+    limit = request.args.get('limit', 50, type=int)
+    if limit < 1:
+        return jsonify({"message": "'limit' must be at least 1."}), 400
+
+    entries = [
+        e for e in slow_queries.entries()
+        if e['duration_ms'] >= min_ms and (not endpoint or e['endpoint'] == endpoint)
+    ]
+    return jsonify({
+        "threshold_ms": None if slow_queries.threshold is None else slow_queries.threshold * 1000,
+        "recorded_total": slow_queries.total,
+        "entries": entries[:limit],
+    }), 200
@@ -1,11 +1,187 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from app.models import User, db
+from app.extensions import cache
 from app.utils.auth import encode_token, admin_required
-from .schemas import pastor_message_schema, pastor_messages_schema
+from app.utils.pagination import paginate_by_pk, add_pagination_headers, page_limit, PaginationError
+from app.utils.export import export_response
+from app.utils.fieldsets import FieldSetError
+from app.utils.notify import ChangeNotifier
+from app.utils.db import primary_reads
+from .timeline import Timeline
+from .search import search_messages, index_message, unindex_message, SearchError
+from .schemas import (
+    pastor_message_schema, pastor_messages_schema, pastor_message_serializer, pastor_message_fieldsets,
+    pastor_message_summary_serializer, pastor_message_summary_fieldsets,
+)
 from marshmallow import ValidationError
+from sqlalchemy import select, or_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
 from werkzeug.security import generate_password_hash, check_password_hash
+from flask import stream_with_context
 from . import pastor_messages_bp
 from app.models import PastorMessage
+from datetime import datetime, timezone
+import hashlib
+
+
+ACTIVE_MESSAGE_CACHE_KEY = 'pastor_messages:active'
+
+# Fired on every write that can change which message is active; wakes SSE
+# subscribers here and, through the version file, in the other workers.
+active_message_events = ChangeNotifier('active_message')
+
+
+def _render(message):
+    body = pastor_message_serializer.jsonify(message).get_data()
+    return 200, body, hashlib.sha256(body).hexdigest()
+
+
+def _render_active_message():
+    """Serialize the active message once and return (status, body, etag).
+
+    Reads the primary: the result is cached until the next write.
+    """
+    with primary_reads(db.session):
+        message = db.session.query(PastorMessage).options(undefer(PastorMessage.message)).filter_by(is_active=True).first()
+        if message:
+            return _render(message)
+
+    body = jsonify({"message": "No active pastor message found."}).get_data()
+    return 404, body, None
+
+
+def _deactivate_others(message_id=None):
+    """Clear the currently active message (other than message_id).
+
+    Only the single active row matches, so this is an index seek rather than a
+    rewrite of the whole table.
+    """
+    query = db.session.query(PastorMessage).filter(PastorMessage.is_active == True)
+    if message_id is not None:
+        query = query.filter(PastorMessage.id != message_id)
+    query.update({'is_active': False}, synchronize_session=False)
+
+
+def _commit_activation():
+    """Commit, returning a 409 response if a concurrent activation won the race."""
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Another pastor message was activated at the same time. Please retry."}), 409
+    return None
+
+
+@active_message_events.on_change
+def _drop_cached_active_message():
+    cache.delete(ACTIVE_MESSAGE_CACHE_KEY)
+
+
+def _invalidate_active_message():
+    """Drop the cached active message everywhere and notify stream subscribers."""
+    active_message_events.publish()
+
+
+def _cached_active_message():
+    """Return (status, body, etag) for the is_active message, rendering on a miss."""
+    cached = cache.get(ACTIVE_MESSAGE_CACHE_KEY)
+    if cached is None:
+        cached = _render_active_message()
+        cache.set(ACTIVE_MESSAGE_CACHE_KEY, cached)
+    return cached
+
+
+@pastor_messages_bp.record_once
+def _init_timeline(state):
+    state.app.extensions['pastor_message_timeline'] = Timeline()
+
+
+@active_message_events.on_change(remote_only=True)
+def _reload_schedule():
+    # another worker changed messages; rebuild from the database on next use
+    current_app.extensions['pastor_message_timeline'].stale = True
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timeline():
+    """Return the schedule index, loading current and future windows if stale."""
+    timeline = current_app.extensions['pastor_message_timeline']
+    if timeline.stale:
+        now = _utcnow()
+        # kept until the next write, so never loaded from a lagging replica
+        with primary_reads(db.session):
+            scheduled = db.session.query(PastorMessage).options(undefer(PastorMessage.message)).filter(
+                PastorMessage.publish_at.isnot(None),
+                or_(PastorMessage.expire_at.is_(None), PastorMessage.expire_at > now),
+            )
+            # the latest started open-ended window wins from then on; skip the ones it shadows
+            shadowing = db.session.query(func.max(PastorMessage.publish_at)).filter(
+                PastorMessage.publish_at <= now, PastorMessage.expire_at.is_(None)).scalar()
+            if shadowing is not None:
+                scheduled = scheduled.filter(PastorMessage.publish_at >= shadowing)
+            timeline.replace((m.id, m.publish_at, m.expire_at, _render(m)) for m in scheduled)
+        timeline.prune(now)
+    return timeline
+
+
+def _reschedule(message):
+    """Apply one committed message to the schedule index."""
+    timeline = _timeline()
+    if message.publish_at is None:
+        timeline.remove(message.id)
+    else:
+        timeline.upsert(message.id, message.publish_at, message.expire_at, _render(message))
+        timeline.prune(_utcnow())
+
+
+def _end_live_windows(message_id=None):
+    """End the scheduled windows live right now so a manual activation shows.
+
+    A live window would otherwise keep winning over the activated message,
+    indefinitely when it has no expire_at. Returns the messages changed so
+    they can be rescheduled after the commit.
+    """
+    now = _utcnow()
+    query = db.session.query(PastorMessage).filter(
+        PastorMessage.publish_at <= now,
+        or_(PastorMessage.expire_at.is_(None), PastorMessage.expire_at > now),
+    )
+    if message_id is not None:
+        query = query.filter(PastorMessage.id != message_id)
+    live = query.all()
+    for message in live:
+        message.expire_at = now
+    return live
+
+
+def _schedule_error(message):
+    if message.publish_at and message.expire_at and message.expire_at <= message.publish_at:
+        return jsonify({"expire_at": ["Must be later than publish_at."]}), 400
+    return None
+
+
+def _current_active_message():
+    """Return (status, body, etag) for what is live now.
+
+    A scheduled message whose window covers now wins, found by bisecting the
+    in-memory timeline; otherwise it is the manually activated message.
+    Activating a message ends any live window, so the later action wins.
+    """
+    active_message_events.start()
+    live = _timeline().at(_utcnow())
+    return live if live is not None else _cached_active_message()
+
+
+def _sse_event(status, body, etag):
+    """Format the active message as one SSE frame (data: null when none is active)."""
+    data = body.decode() if status == 200 else "null"
+    lines = "".join(f"data: {line}\n" for line in data.splitlines())
+    event_id = f"id: {etag}\n" if etag else ""
+    return f"event: active-message\n{event_id}{lines}\n"
 
 
 @pastor_messages_bp.route('', methods=['POST'])
@@ -17,12 +193,29 @@ def create_message():
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    # If this message is active, deactivate all others
+    invalid = _schedule_error(new_message)
+    if invalid:
+        return invalid
+
+    # New messages are active unless told otherwise (matches the column default);
+    # scheduled ones go live through their window instead
+    if new_message.is_active is None:
+        new_message.is_active = new_message.publish_at is None
+
+    # If this message is active, deactivate the current one
+    ended = []
     if new_message.is_active:
-        db.session.query(PastorMessage).update({'is_active': False})
+        _deactivate_others()
+        ended = _end_live_windows()
     
     db.session.add(new_message)
-    db.session.commit()
+    index_message(new_message)
+    conflict = _commit_activation()
+    if conflict:
+        return conflict
+    for message in ended + [new_message]:
+        _reschedule(message)
+    _invalidate_active_message()
     
     return jsonify({
         "message": "Pastor message created successfully.",
@@ -43,8 +236,10 @@ def update_message(message_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    ended = []
     if data.get('is_active', False):
-        db.session.query(PastorMessage).filter(PastorMessage.id != message_id).update({'is_active': False})
+        _deactivate_others(message_id)
+        ended = _end_live_windows(message_id)
     
    
     if 'title' in data:
@@ -53,8 +248,26 @@ def update_message(message_id):
         message.message = data['message']
     if 'is_active' in data:
         message.is_active = data['is_active']
+    try:
+        for key in ('publish_at', 'expire_at'):
+            if key in data:
+                setattr(message, key, pastor_message_schema.fields[key].deserialize(data[key]))
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({key: e.messages}), 400
+    invalid = _schedule_error(message)
+    if invalid:
+        db.session.rollback()
+        return invalid
+    if 'title' in data or 'message' in data:
+        index_message(message)
     
-    db.session.commit()
+    conflict = _commit_activation()
+    if conflict:
+        return conflict
+    for changed in ended + [message]:
+        _reschedule(changed)
+    _invalidate_active_message()
     
     return jsonify({
         "message": "Pastor message updated successfully.",
@@ -67,19 +280,109 @@ def update_message(message_id):
 @pastor_messages_bp.route('/active', methods=['GET'])
 def get_active_message():
     """Get the currently active pastor message"""
-    message = db.session.query(PastorMessage).filter_by(is_active=True).first()
-    
-    if message:
-        return pastor_message_schema.jsonify(message), 200
-    
-    return jsonify({"message": "No active pastor message found."}), 404
+    # Served from the schedule index or the cache; only re-query after a write.
+    status, body, etag = _current_active_message()
+
+    if etag and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, status=status, mimetype='application/json')
+
+    if etag:
+        response.set_etag(etag)
+        # let browsers keep the copy but always revalidate with If-None-Match
+        response.cache_control.no_cache = True
+    return response
+
+@pastor_messages_bp.route('/active/stream', methods=['GET'])
+def stream_active_message():
+    """Push the active message as Server-Sent Events whenever it changes"""
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+
+    def events():
+        version = active_message_events.version
+        sent = _current_active_message()
+        yield _sse_event(*sent)
+        # don't pin a pooled connection for the lifetime of the stream
+        db.session.remove()
+        while True:
+            # also wake when a scheduled window opens or closes
+            timeout = heartbeat
+            boundary = _timeline().next_boundary(_utcnow())
+            if boundary is not None:
+                timeout = min(timeout, max((boundary - _utcnow()).total_seconds(), 0) + 0.01)
+            version = active_message_events.wait(version, timeout)
+            current = _current_active_message()
+            db.session.remove()
+            if current[::2] == sent[::2]:
+                yield ": keep-alive\n\n"
+                continue
+            sent = current
+            yield _sse_event(*sent)
+
+    response = current_app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    # stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @pastor_messages_bp.route('', methods=['GET'])
 @admin_required
 def get_all_messages():
-    """Get all pastor messages (admin only)"""
-    messages = db.session.query(PastorMessage).all()
-    return pastor_messages_schema.jsonify(messages), 200
+    """List message summaries (admin only), one page at a time; bodies come from GET /<id>"""
+    try:
+        fields = pastor_message_summary_fieldsets.parse()
+    except FieldSetError as e:
+        return jsonify({"message": str(e)}), 400
+
+    serializer = pastor_message_summary_serializer
+    if fields:
+        serializer = pastor_message_summary_fieldsets.serializer(fields)
+    # only the summary columns are SELECTed, however long the bodies get
+    columns = fields or tuple(pastor_message_summary_fieldsets.allowed)
+    query = db.session.query(PastorMessage).options(pastor_message_summary_fieldsets.load_only(columns))
+
+    try:
+        messages, next_cursor = paginate_by_pk(query, PastorMessage.id)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+    return add_pagination_headers(serializer.jsonify(messages, many=True), next_cursor), 200
+
+@pastor_messages_bp.route('/<int:message_id>', methods=['GET'])
+@admin_required
+def get_message(message_id):
+    """Get one pastor message including its full body (admin only)"""
+    try:
+        fields = pastor_message_fieldsets.parse()
+    except FieldSetError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if fields:
+        message = db.session.get(PastorMessage, message_id, options=[pastor_message_fieldsets.load_only(fields)])
+        serializer = pastor_message_fieldsets.serializer(fields)
+    else:
+        message = db.session.get(PastorMessage, message_id, options=[undefer(PastorMessage.message)])
+        serializer = pastor_message_serializer
+    if message:
+        return serializer.jsonify(message), 200
+    return jsonify({"message": "Pastor message not found."}), 404
+
+@pastor_messages_bp.route('/export', methods=['GET'])
+@admin_required
+def export_messages():
+    """Stream the whole message archive as NDJSON or CSV (admin only)"""
+    stmt = select(PastorMessage.id, PastorMessage.title, PastorMessage.message, PastorMessage.is_active).order_by(PastorMessage.id)
+    return export_response(stmt, 'pastor_messages')
+
+@pastor_messages_bp.route('/search', methods=['GET'])
+@admin_required
+def search_messages_route():
+    """Search the archive by keyword, best matches first (admin only)"""
+    try:
+        results, next_cursor = search_messages(request.args.get('q'), page_limit(), request.args.get('after'))
+    except (SearchError, PaginationError) as e:
+        return jsonify({"message": str(e)}), 400
+    return add_pagination_headers(jsonify(results), next_cursor), 200
 
 @pastor_messages_bp.route('/<int:message_id>', methods=['DELETE'])
 @admin_required
@@ -91,7 +394,10 @@ def delete_message(message_id):
         return jsonify({"message": "Pastor message not found."}), 404
     
     db.session.delete(message)
+    unindex_message(message_id)
     db.session.commit()
+    _timeline().remove(message_id)
+    _invalidate_active_message()
     
     return jsonify({"message": "Pastor message deleted successfully."}), 200
 
@@ -104,12 +410,18 @@ def activate_message(message_id):
     if not message:
         return jsonify({"message": "Pastor message not found."}), 404
     
-    # Deactivate all messages
-    db.session.query(PastorMessage).update({'is_active': False})
+    # Deactivate the current message, and end a live schedule that would hide this one
+    _deactivate_others(message_id)
+    ended = _end_live_windows(message_id)
     
     # Activate this message
     message.is_active = True
-    db.session.commit()
+    conflict = _commit_activation()
+    if conflict:
+        return conflict
+    for changed in ended:
+        _reschedule(changed)
+    _invalidate_active_message()
     
     return jsonify({
         "message": "Pastor message activated successfully.",
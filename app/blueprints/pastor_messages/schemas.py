@@ -1,5 +1,7 @@
 from app.extensions import ma
 from app.models import PastorMessage
+from app.utils.serializers import RowSerializer
+from app.utils.fieldsets import FieldSets
 
 
 class PastorMessageSchema(ma.SQLAlchemyAutoSchema):
@@ -7,7 +9,22 @@ class PastorMessageSchema(ma.SQLAlchemyAutoSchema):
         model = PastorMessage
         include_fk = True
         load_instance = True
+
+    # maintained from the body on write, never accepted from clients
+    preview = ma.auto_field(dump_only=True)
+
+
+class PastorMessageSummarySchema(ma.SQLAlchemyAutoSchema):
+    """List view: the preview stands in for the (deferred) body."""
+    class Meta:
+        model = PastorMessage
+        fields = ('id', 'title', 'is_active', 'preview')
         
         
 pastor_message_schema = PastorMessageSchema()
-pastor_messages_schema = PastorMessageSchema(many=True)
\ No newline at end of file
+pastor_messages_schema = PastorMessageSchema(many=True)
+# precompiled equivalent of pastor_message_schema.dump for the hot read endpoints
+pastor_message_serializer = RowSerializer(pastor_message_schema)
+pastor_message_fieldsets = FieldSets(PastorMessageSchema, PastorMessage)
+pastor_message_summary_serializer = RowSerializer(PastorMessageSummarySchema())
+pastor_message_summary_fieldsets = FieldSets(PastorMessageSummarySchema, PastorMessage)
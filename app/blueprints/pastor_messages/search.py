@@ -0,0 +1,151 @@
+"""Full-text search over the pastor message archive.
+
+SQLite keeps a separate FTS5 table keyed by message id, which the write routes
+update in the same transaction (``index_message`` / ``unindex_message``).
+Postgres indexes an expression with GIN instead, so the database maintains it
+and those calls are no-ops there.
+"""
+import html
+import re
+from sqlalchemy import DDL, event, text
+from app.models import PastorMessage, db
+from app.utils.pagination import encode_rank_cursor, decode_rank_cursor
+
+
+FTS_TABLE = 'pastor_messages_fts'
+# must match the index expression exactly for Postgres to use the GIN index
+PG_DOCUMENT = "to_tsvector('english', title || ' ' || message)"
+
+HIGHLIGHT_START, HIGHLIGHT_END = '<mark>', '</mark>'
+# the database wraps matches in these private-use characters; the text is
+# HTML-escaped before they become the markup above
+_MARK_START, _MARK_END = '\ue000', '\ue001'
+
+_sqlite_create = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, message, tokenize='porter unicode61')"
+)
+_sqlite_drop = DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+_pg_create = DDL(f"CREATE INDEX IF NOT EXISTS ix_pastor_messages_fts ON pastor_messages USING gin ({PG_DOCUMENT})")
+
+event.listen(PastorMessage.__table__, 'after_create', _sqlite_create.execute_if(dialect='sqlite'))
+event.listen(PastorMessage.__table__, 'before_drop', _sqlite_drop.execute_if(dialect='sqlite'))
+event.listen(PastorMessage.__table__, 'after_create', _pg_create.execute_if(dialect='postgresql'))
+
+
+class SearchError(ValueError):
+    """Raised for an unusable ?q=; the route turns it into a 400."""
+
+
+def build_search_index(conn):
+    """Create the index if missing and fill in any messages it lacks (idempotent)."""
+    if conn.dialect.name == 'postgresql':
+        conn.execute(_pg_create)
+    elif conn.dialect.name == 'sqlite':
+        conn.execute(_sqlite_create)
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, message) "
+            f"SELECT id, title, message FROM pastor_messages "
+            f"WHERE id NOT IN (SELECT rowid FROM {FTS_TABLE})"
+        ))
+
+
+def index_message(message):
+    """(Re)index one message inside the current session's transaction."""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return
+    if message.id is None:
+        db.session.flush()
+    unindex_message(message.id)
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, message) VALUES (:id, :title, :message)"),
+        {"id": message.id, "title": message.title, "message": message.message},
+    )
+
+
+def unindex_message(message_id):
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": message_id})
+
+
+def _fts5_query(q):
+    # Quote every word so user input can never be read as FTS5 syntax.
+    terms = re.findall(r"\w+", q or "")
+    if not terms:
+        raise SearchError("'q' must contain at least one word.")
+    return " ".join(f'"{term}"' for term in terms)
+
+
+_SQLITE_SEARCH = text(f"""
+    SELECT s.id, m.title, m.is_active, s.highlight, s.snippet, s.rank
+    FROM (
+        SELECT rowid AS id,
+               highlight({FTS_TABLE}, 0, :start, :end) AS highlight,
+               snippet({FTS_TABLE}, 1, :start, :end, '…', 24) AS snippet,
+               bm25({FTS_TABLE}, 10.0, 1.0) AS rank
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH :q
+    ) AS s
+    JOIN pastor_messages AS m ON m.id = s.id
+    WHERE :after_rank IS NULL OR s.rank > :after_rank OR (s.rank = :after_rank AND s.id > :after_id)
+    ORDER BY s.rank, s.id
+    LIMIT :limit
+""")
+
+# ts_rank_cd is negated so both dialects sort best-first with ORDER BY rank ASC
+_PG_SEARCH = text(f"""
+    SELECT s.id, s.title, s.is_active,
+           ts_headline('english', s.title, s.query, 'StartSel=' || :start || ', StopSel=' || :end || ', HighlightAll=true') AS highlight,
+           ts_headline('english', s.message, s.query, 'StartSel=' || :start || ', StopSel=' || :end || ', MaxWords=24, MinWords=8') AS snippet,
+           s.rank
+    FROM (
+        SELECT m.id, m.title, m.message, m.is_active, query, -ts_rank_cd({PG_DOCUMENT}, query) AS rank
+        FROM pastor_messages AS m, websearch_to_tsquery('english', :q) AS query
+        WHERE {PG_DOCUMENT} @@ query
+    ) AS s
+    WHERE CAST(:after_rank AS double precision) IS NULL OR s.rank > :after_rank OR (s.rank = :after_rank AND s.id > :after_id)
+    ORDER BY s.rank, s.id
+    LIMIT :limit
+""")
+
+
+def _markup(fragment):
+    escaped = html.escape(fragment or "", quote=False)
+    return escaped.replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_END, HIGHLIGHT_END)
+
+
+def _result(row):
+    result = dict(row)
+    # SQLite hands back 0/1 from the raw query
+    result["is_active"] = bool(result["is_active"])
+    result["highlight"] = _markup(result["highlight"])
+    result["snippet"] = _markup(result["snippet"])
+    return result
+
+
+def search_messages(q, limit, after=None):
+    """Return (results, next_cursor) for one page of ranked, highlighted matches.
+
+    Pages are keyset on (rank, id), so each costs a walk over the matches only.
+    """
+    after_rank, after_id = decode_rank_cursor(after) if after else (None, None)
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        if not (q or "").strip():
+            raise SearchError("'q' must contain at least one word.")
+        stmt, match = _PG_SEARCH, q
+    else:
+        stmt, match = _SQLITE_SEARCH, _fts5_query(q)
+
+    # fetch one extra row to learn whether another page exists
+    rows = db.session.execute(stmt, {
+        "q": match, "start": _MARK_START, "end": _MARK_END,
+        "after_rank": after_rank, "after_id": after_id, "limit": limit + 1,
+    }).mappings().all()
+
+    results = [_result(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_rank_cursor(results[-1]["rank"], results[-1]["id"])
+    return results, next_cursor
@@ -0,0 +1,154 @@
+"""In-memory index of scheduled pastor messages.
+
+Each scheduled message covers [publish_at, expire_at). The index flattens the
+windows into segments between consecutive boundaries, each with the message
+that wins there (the latest publish_at), so "what is live now" is one bisect
+and a scheduled transition needs no write at all.
+
+A write only recomputes the segments inside the windows it touched, and
+prune() drops windows that can no longer win, so the index holds roughly the
+current and future schedule rather than its whole history.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class Timeline:
+    """Windows keyed by message id, resolved to the winning value at any instant."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}
+        # boundary -> number of window starts/ends there
+        self._refs = {}
+        self._bounds = []
+        # winning key per segment; segment i is [bounds[i-1], bounds[i]), the first open to the past
+        self._keys = [None]
+        # (sorted boundaries, winner per segment); swapped in whole so reads need no lock
+        self._segments = ((), (None,))
+        self.stale = True
+
+    def replace(self, windows):
+        """Load the full set of (key, start, end, value) windows."""
+        with self._lock:
+            self._windows = {key: (start, end, value) for key, start, end, value in windows}
+            self._rebuild()
+            self.stale = False
+
+    def upsert(self, key, start, end, value):
+        with self._lock:
+            old = self._windows.get(key)
+            self._windows[key] = (start, end, value)
+            self._update(old, (start, end, value))
+
+    def remove(self, key):
+        with self._lock:
+            old = self._windows.pop(key, None)
+            if old is not None:
+                self._update(old, None)
+
+    def prune(self, now):
+        """Drop windows that cannot win at ``now`` or later.
+
+        Those are windows that have ended, and windows that started before
+        the latest already-started window without an end, which wins from
+        then on.
+        """
+        with self._lock:
+            latest = max(((start, key) for key, (start, end, _) in self._windows.items()
+                          if end is None and start <= now), default=None)
+            dead = [key for key, (start, end, _) in self._windows.items()
+                    if (end is not None and end <= now) or (latest is not None and (start, key) < latest)]
+            if dead:
+                for key in dead:
+                    del self._windows[key]
+                self._rebuild()
+
+    def at(self, when):
+        """Return the value live at ``when``, or None when nothing is scheduled."""
+        bounds, winners = self._segments
+        return winners[bisect_right(bounds, when)]
+
+    def next_boundary(self, when):
+        """Return the next instant after ``when`` at which the answer can change."""
+        bounds, _ = self._segments
+        i = bisect_right(bounds, when)
+        return bounds[i] if i < len(bounds) else None
+
+    def __len__(self):
+        return len(self._windows)
+
+    def _rebuild(self):
+        self._refs = {}
+        for start, end, _ in self._windows.values():
+            for t in (start, end):
+                if t is not None:
+                    self._refs[t] = self._refs.get(t, 0) + 1
+        self._bounds = sorted(self._refs)
+        self._keys = [None] + self._sweep(self._bounds, self._windows.items())
+        self._publish()
+
+    def _update(self, old, new):
+        """Recompute only the segments starting between the earliest start and latest end of old/new.
+
+        Boundaries are only added or removed inside that range, so the
+        segments before it keep their winners.
+        """
+        changed = [w for w in (old, new) if w is not None]
+        lo = min(start for start, _, _ in changed)
+        hi = None if any(end is None for _, end, _ in changed) else max(end for _, end, _ in changed)
+        if old is not None:
+            for t in old[:2]:
+                self._unref(t)
+        if new is not None:
+            for t in new[:2]:
+                self._ref(t)
+
+        first = bisect_left(self._bounds, lo)
+        last = len(self._bounds) if hi is None else bisect_right(self._bounds, hi)
+        overlapping = [(key, w) for key, w in self._windows.items()
+                       if (hi is None or w[0] <= hi) and (w[1] is None or w[1] > lo)]
+        self._keys[first + 1:last + 1] = self._sweep(self._bounds[first:last], overlapping)
+        self._publish()
+
+    def _ref(self, t):
+        if t is None:
+            return
+        if t not in self._refs:
+            i = bisect_left(self._bounds, t)
+            self._bounds.insert(i, t)
+            # split the segment; the caller recomputes both halves
+            self._keys.insert(i + 1, self._keys[i])
+        self._refs[t] = self._refs.get(t, 0) + 1
+
+    def _unref(self, t):
+        if t is None:
+            return
+        self._refs[t] -= 1
+        if not self._refs[t]:
+            del self._refs[t]
+            i = bisect_left(self._bounds, t)
+            del self._bounds[i]
+            del self._keys[i + 1]
+
+    @staticmethod
+    def _sweep(starts, windows):
+        """Winning key at each of the sorted ``starts`` among ``windows``.
+
+        Windows are pushed in (start, key) order, so the top of the stack is
+        the best started one; popped windows have ended and stay ended.
+        """
+        ordered = sorted(windows, key=lambda item: (item[1][0], item[0]))
+        stack, winners, i = [], [], 0
+        for t in starts:
+            while i < len(ordered) and ordered[i][1][0] <= t:
+                stack.append(ordered[i])
+                i += 1
+            while stack and stack[-1][1][1] is not None and stack[-1][1][1] <= t:
+                stack.pop()
+            winners.append(stack[-1][0] if stack else None)
+        return winners
+
+    def _publish(self):
+        self._segments = (tuple(self._bounds),
+                          tuple(None if key is None else self._windows[key][2] for key in self._keys))
@@ -0,0 +1,106 @@
+import json
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from app.models import User, db, normalize_email
+from app.utils.passwords import hasher
+from .schemas import users_bulk_schema
+
+
+BULK_FIELDS = ('username', 'email', 'password', 'role')
+
+
+def read_ndjson(stream):
+    """Yield one parsed object per non-blank line, or a ValueError for bad lines."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+def import_users(rows):
+    """Validate, de-duplicate, hash and insert a batch of user dicts.
+
+    Returns one result per input row, in order. A bad row only fails itself:
+    everything valid is still inserted.
+    """
+    results = [None] * len(rows)
+
+    for index, row in enumerate(rows):
+        if isinstance(row, Exception):
+            results[index] = {"index": index, "status": "error", "errors": {"_json": [str(row)]}}
+            rows[index] = {}
+
+    try:
+        loaded, errors = users_bulk_schema.load(rows), {}
+    except ValidationError as e:
+        loaded, errors = e.valid_data or [], e.messages if isinstance(e.messages, dict) else {}
+
+    candidates = []
+    seen = set()
+    for index, row in enumerate(rows):
+        if results[index] is not None:
+            continue
+        if index in errors:
+            results[index] = {"index": index, "status": "error", "errors": errors[index]}
+            continue
+        data = {k: loaded[index][k] for k in BULK_FIELDS if k in loaded[index]}
+        data['email'] = normalize_email(data['email'])
+        data.setdefault('role', 'user')
+        if data['email'] in seen:
+            results[index] = {"index": index, "status": "error", "errors": {"email": ["Duplicate email in this batch."]}}
+            continue
+        seen.add(data['email'])
+        candidates.append((index, data))
+
+    # one set-based lookup per chunk instead of a SELECT per user
+    existing = set()
+    emails = [data['email'] for _, data in candidates]
+    for start in range(0, len(emails), 500):
+        existing.update(db.session.execute(
+            select(User.email).where(User.email.in_(emails[start:start + 500]))
+        ).scalars())
+
+    new_rows = []
+    for index, data in candidates:
+        if data['email'] in existing:
+            results[index] = {"index": index, "status": "error", "errors": {"email": ["User with this email already exists."]}}
+        else:
+            new_rows.append((index, data))
+
+    # may raise HashingBusy; the route turns that into a 503 for the whole batch
+    hashes = hasher.hash_many([data['password'] for _, data in new_rows])
+    for (_, data), pwhash in zip(new_rows, hashes):
+        data['password'] = pwhash
+
+    chunk_size = current_app.config.get('BULK_IMPORT_CHUNK_SIZE', 500)
+    for start in range(0, len(new_rows), chunk_size):
+        _insert_chunk(new_rows[start:start + chunk_size], results)
+    return results
+
+
+def _insert_chunk(chunk, results):
+    stmt = insert(User).returning(User.id, sort_by_parameter_order=True)
+    try:
+        ids = db.session.execute(stmt, [data for _, data in chunk]).scalars().all()
+        db.session.commit()
+    except IntegrityError:
+        # someone else took one of these emails meanwhile; retry row by row
+        db.session.rollback()
+        for index, data in chunk:
+            try:
+                user_id = db.session.execute(stmt, [data]).scalar_one()
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                results[index] = {"index": index, "status": "error", "errors": {"email": ["User with this email already exists."]}}
+            else:
+                results[index] = {"index": index, "status": "created", "id": user_id, "email": data['email']}
+        return
+    for (index, data), user_id in zip(chunk, ids):
+        results[index] = {"index": index, "status": "created", "id": user_id, "email": data['email']}
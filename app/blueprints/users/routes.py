@@ -1,10 +1,23 @@
-from flask import request, jsonify
-from app.models import User, db
+from flask import request, jsonify, current_app
+from app.models import User, db, normalize_email
 from app.utils.auth import encode_token, token_required, admin_required
-from .schemas import user_schema, users_schema, login_schema
+from app.utils.pagination import paginate_by_pk, add_pagination_headers, PaginationError
+from app.utils.passwords import hasher, HashingBusy
+from app.utils.export import export_response
+from app.utils.fieldsets import FieldSetError
+from .schemas import user_schema, users_schema, login_schema, user_update_schema, user_serializer, user_fieldsets
 from marshmallow import ValidationError
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import select
+from .bulk import import_users, read_ndjson
 from . import users_bp
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+def _hashing_busy():
+    return jsonify({"message": "Server is busy, please try again shortly."}), 503, {"Retry-After": "1"}
 
 
 
@@ -16,12 +29,12 @@ def login():
 
     raw_json = request.get_json(silent=True) or {}
     
-    print(f"Login payload keys: {list(raw_json.keys())}")
+    log.debug("login payload", extra={"fields": {"keys": list(raw_json.keys())}})
 
     try:
         data = login_schema.load(raw_json)
     except ValidationError as e:
-        print(f"Validation error: {e.messages}") 
+        log.info("login validation error", extra={"fields": {"errors": e.messages}})
         return jsonify({"message": "Invalid request format", "errors": e.messages}), 400
 
     
@@ -31,28 +44,38 @@ def login():
     
     user = None
     if data.get('email'):
-        email_lower = data['email'].lower().strip()
-        print(f"Login attempt using email: '{email_lower}'")  
-        user = db.session.query(User).filter(db.func.lower(User.email) == email_lower).first()
+        email_lower = normalize_email(data['email'])
+        log.debug("login attempt", extra={"fields": {"email": email_lower}})
+        user = db.session.query(User).filter(User.email == email_lower).first()
     elif data.get('username'):
         username = data['username'].strip()
-        print(f"Login attempt using username: '{username}'") 
+        log.debug("login attempt", extra={"fields": {"username": username}})
         user = db.session.query(User).filter(User.username == username).first()
     else:
         return jsonify({"message": "Either 'email' or 'username' is required."}), 400
 
     if not user:
-        print("User lookup failed")  
+        log.info("login failed: user lookup")
         return jsonify({"message": "Invalid email or password."}), 401
 
-    password_match = check_password_hash(user.password, data.get("password", ""))
-    print(f"Password match result: {password_match}")  
+    try:
+        password_match = hasher.verify(user.password, data.get("password", ""))
+    except HashingBusy:
+        return _hashing_busy()
+    log.debug("login password check", extra={"fields": {"match": password_match}})
 
     if password_match:
+        # Transparently upgrade hashes made with older cost settings.
+        if hasher.needs_rehash(user.password):
+            try:
+                user.password = hasher.hash(data["password"])
+                db.session.commit()
+            except HashingBusy:
+                pass  # keep the old hash; it is upgraded on a later login
         token = encode_token(user.id, user.role)
         return jsonify({"message": "Login successful", "token": token, "user": user_schema.dump(user)}), 200
 
-    print("Password check failed")  
+    log.info("login failed: password check")
     return jsonify({"message": "Invalid email or password."}), 401  
 
 
@@ -63,21 +86,24 @@ def create_user():
     
     
     if "email" in raw_data and raw_data["email"]:
-        raw_data["email"] = raw_data["email"].lower().strip()
+        raw_data["email"] = normalize_email(raw_data["email"])
     
     try:
         new_user = user_schema.load(raw_data)
     except ValidationError as e:
         return jsonify({"message": "Invalid request format", "errors": e.messages}), 400 
     
-   
-    new_user.password = generate_password_hash(raw_data["password"])
     
-    
-    existing_user = db.session.query(User).filter(db.func.lower(User.email) == new_user.email).first()
+    existing_user = db.session.query(User).filter(User.email == new_user.email).first()
     if existing_user: 
         return jsonify({"message": "User with this email already exists."}), 400
 
+    # hash only after the cheap uniqueness check has passed
+    try:
+        new_user.password = hasher.hash(raw_data["password"])
+    except HashingBusy:
+        return _hashing_busy()
+
     db.session.add(new_user)
     db.session.commit()
 
@@ -90,20 +116,84 @@ def create_user():
         "token": token
     }), 201
 
+@users_bp.route('/bulk', methods=['POST'])
+@admin_required
+def bulk_create_users():
+    """
+    Create many users in one request (admin only).
+    Accepts a JSON array or NDJSON (application/x-ndjson, one user per line).
+    Returns a result per row; invalid rows don't stop the valid ones.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        rows = list(read_ndjson(request.stream))
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            return jsonify({"message": "Expected a JSON array or NDJSON of users."}), 400
+
+    max_rows = current_app.config.get('BULK_IMPORT_MAX_ROWS', 5000)
+    if len(rows) > max_rows:
+        return jsonify({"message": f"At most {max_rows} users per request."}), 413
+
+    try:
+        results = import_users(rows)
+    except HashingBusy:
+        return _hashing_busy()
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return jsonify({
+        "message": f"Created {created} of {len(results)} users.",
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }), 200
+
 @users_bp.route('', methods=['GET'])
 @token_required
 def get_users():
     
-    users = db.session.query(User).all()
-    return users_schema.jsonify(users), 200
+    try:
+        fields = user_fieldsets.parse()
+    except FieldSetError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = db.session.query(User)
+    serializer = user_serializer
+    if fields:
+        # e.g. ?fields=id,username for the admin picker: skip the other columns entirely
+        query = query.options(user_fieldsets.load_only(fields))
+        serializer = user_fieldsets.serializer(fields)
+
+    try:
+        users, next_cursor = paginate_by_pk(query, User.id)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+    return add_pagination_headers(serializer.jsonify(users, many=True), next_cursor), 200
+
+@users_bp.route('/export', methods=['GET'])
+@admin_required
+def export_users():
+    """Stream every member as NDJSON or CSV (admin only); password hashes are never exported."""
+    stmt = select(User.id, User.username, User.email, User.role, User.created_at).order_by(User.id)
+    return export_response(stmt, 'users')
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
 @token_required
 def get_user(user_id):
 
-    user = db.session.get(User, user_id)
+    try:
+        fields = user_fieldsets.parse()
+    except FieldSetError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if fields:
+        user = db.session.get(User, user_id, options=[user_fieldsets.load_only(fields)])
+        serializer = user_fieldsets.serializer(fields)
+    else:
+        user = db.session.get(User, user_id)
+        serializer = user_serializer
     if user:
-        return user_schema.jsonify(user), 200
+        return serializer.jsonify(user), 200
     return jsonify({"message": "User not found."}), 404
 
 @users_bp.route('/<int:user_id>', methods=['PUT'])
@@ -113,31 +203,46 @@ def update_user_by_id(user_id):
     Accept only PUT for full/partial updates.
     Blank or omitted password will not overwrite existing password.
     Email cannot be changed (case-insensitive check).
+    Users may only update themselves unless they are an admin; the role is
+    changed through PATCH /users/<id>/role.
     """
+    if request.user_id != user_id and request.user_role != 'admin':
+        return jsonify({"message": "You can only update your own account."}), 403
+
     user = db.session.get(User, user_id)
     if not user:
         return jsonify({"message": "User not found."}), 404
 
     
     raw = request.get_json(silent=True) or {}
+    if 'role' in raw:
+        if raw['role'] != user.role:
+            return jsonify({"message": "Use PATCH /users/<id>/role to change a user's role."}), 403
+        raw.pop('role')
     if 'password' in raw:
         pw = raw.get('password')
         if pw is None or (isinstance(pw, str) and pw.strip() == ""):
             raw.pop('password', None)
 
     
-    data = user_schema.load(raw, partial=True)
+    try:
+        data = user_update_schema.load(raw, partial=True)
+    except ValidationError as e:
+        return jsonify({"message": "Invalid request format", "errors": e.messages}), 400
 
     
     if 'password' in data and data['password']:
-        data['password'] = generate_password_hash(data['password'])
+        try:
+            data['password'] = hasher.hash(data['password'])
+        except HashingBusy:
+            return _hashing_busy()
     else:
         data.pop('password', None)
 
     
     if 'email' in data and data['email']:
-        new_email = data['email'].lower().strip()
-        current_email = (user.email or "").lower().strip()
+        new_email = normalize_email(data['email'])
+        current_email = normalize_email(user.email or "")
         if new_email != current_email:
             return jsonify({"message": "Email cannot be changed."}), 400
         data.pop('email', None)
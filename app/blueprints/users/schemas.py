@@ -1,5 +1,7 @@
 from app.extensions import ma
 from app.models import User
+from app.utils.serializers import RowSerializer
+from app.utils.fieldsets import FieldSets
 
 
 class UserSchema(ma.SQLAlchemyAutoSchema):
@@ -18,4 +20,12 @@ class LoginSchema(ma.Schema):
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True) 
-login_schema = LoginSchema()
\ No newline at end of file
+# plain dict loading for partial updates applied onto an existing user;
+# roles only change through the admin-only PATCH /users/<id>/role
+user_update_schema = UserSchema(load_instance=False, exclude=('id', 'role'))
+# batch validation for POST /users/bulk; rows stay dicts for a Core executemany
+users_bulk_schema = UserSchema(many=True, load_instance=False)
+login_schema = LoginSchema()
+# precompiled equivalent of user_schema.dump for the hot read endpoints
+user_serializer = RowSerializer(user_schema)
+user_fieldsets = FieldSets(UserSchema, User)
@@ -1,3 +1,5 @@
 from flask_marshmallow import Marshmallow
+from flask_caching import Cache
 
-ma = Marshmallow()
\ No newline at end of file
+ma = Marshmallow()
+cache = Cache()
@@ -0,0 +1,160 @@
+"""Versioned schema upgrades.
+
+The schema_version table holds the number of MIGRATIONS already applied, so
+startup only needs one cheap read of it (``ensure_schema``). Upgrading is a
+separate step, ``flask db-upgrade``. Every step is also idempotent so it is
+safe against a database that predates the version table.
+"""
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Table, Column, Integer, select, update, delete, insert, func, text, inspect, bindparam
+from sqlalchemy.exc import DBAPIError
+from app.models import db, User, PastorMessage, pastor_message_active_index, normalize_email, make_preview
+from app.blueprints.pastor_messages.search import build_search_index
+
+
+log = logging.getLogger(__name__)
+
+schema_version = Table(
+    'schema_version', db.metadata,
+    Column('version', Integer, nullable=False),
+)
+
+
+def _one_active_pastor_message(conn):
+    # Older databases may have several active rows; keep the newest one active
+    # so the unique partial index can be built.
+    newest_active = conn.execute(
+        select(func.max(PastorMessage.id)).where(PastorMessage.is_active == True)
+    ).scalar()
+    if newest_active is not None:
+        conn.execute(
+            update(PastorMessage)
+            .where(PastorMessage.is_active == True, PastorMessage.id != newest_active)
+            .values(is_active=False)
+        )
+    pastor_message_active_index.create(conn, checkfirst=True)
+
+
+def _normalize_user_emails(conn):
+    # Rewrite emails into the canonical form the login/signup lookups expect.
+    # A row whose canonical form already belongs to another user is left as is
+    # for manual cleanup rather than failing the unique constraint.
+    rows = conn.execute(
+        select(User.id, User.email).where(User.email != func.lower(func.trim(User.email)))
+    ).all()
+    for user_id, email in rows:
+        canonical = normalize_email(email)
+        taken = conn.execute(select(User.id).where(User.email == canonical)).first()
+        if taken is None:
+            conn.execute(update(User).where(User.id == user_id).values(email=canonical))
+
+
+def _pastor_message_schedule(conn):
+    # create_all never alters existing tables, so add the schedule columns here.
+    existing = {column['name'] for column in inspect(conn).get_columns('pastor_messages')}
+    for name in ('publish_at', 'expire_at'):
+        if name not in existing:
+            column_type = PastorMessage.__table__.c[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE pastor_messages ADD COLUMN {name} {column_type}"))
+
+
+def _pastor_message_previews(conn):
+    # Bodies become unbounded TEXT (SQLite never enforced the VARCHAR length)
+    # and list views read a stored preview, backfilled here for old rows.
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("ALTER TABLE pastor_messages ALTER COLUMN message TYPE TEXT"))
+    existing = {column['name'] for column in inspect(conn).get_columns('pastor_messages')}
+    if 'preview' not in existing:
+        column_type = PastorMessage.__table__.c.preview.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE pastor_messages ADD COLUMN preview {column_type} NOT NULL DEFAULT ''"))
+    rows = conn.execute(
+        select(PastorMessage.id, PastorMessage.message).where(PastorMessage.preview == '', PastorMessage.message != '')
+    ).all()
+    if rows:
+        conn.execute(
+            update(PastorMessage.__table__)
+            .where(PastorMessage.__table__.c.id == bindparam('message_id'))
+            .values(preview=bindparam('new_preview')),
+            [{"message_id": message_id, "new_preview": make_preview(message)} for message_id, message in rows],
+        )
+
+
+MIGRATIONS = [
+    ('0001_one_active_pastor_message', _one_active_pastor_message),
+    ('0002_normalize_user_emails', _normalize_user_emails),
+    ('0003_pastor_message_search_index', build_search_index),
+    ('0004_pastor_message_schedule', _pastor_message_schedule),
+    ('0005_pastor_message_previews', _pastor_message_previews),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _read_version(conn):
+    return conn.execute(select(schema_version.c.version)).scalar() or 0
+
+
+def current_version(engine):
+    """Return the applied version, or None when the database has no version table yet."""
+    try:
+        with engine.connect() as conn:
+            return _read_version(conn)
+    except DBAPIError:
+        return None
+
+
+def upgrade(engine):
+    """Create missing tables, then apply the migration steps not yet recorded.
+
+    Returns the names of the steps that ran.
+    """
+    applied = []
+    with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            # serialize concurrent upgrades from several workers starting at once
+            conn.execute(text("SELECT pg_advisory_xact_lock(4242001)"))
+        db.metadata.create_all(conn)
+        version = _read_version(conn)
+        for number, (name, step) in enumerate(MIGRATIONS, start=1):
+            if number > version:
+                step(conn)
+                applied.append(name)
+        if version < SCHEMA_VERSION:
+            conn.execute(delete(schema_version))
+            conn.execute(insert(schema_version).values(version=SCHEMA_VERSION))
+    return applied
+
+
+def ensure_schema(app):
+    """Startup check: a single read of schema_version.
+
+    Upgrades in place only when SCHEMA_AUTO_UPGRADE is set; otherwise a stale
+    database is a hard error pointing at ``flask db-upgrade``.
+    """
+    version = current_version(db.engine)
+    if version == SCHEMA_VERSION:
+        return version
+    if version is not None and version > SCHEMA_VERSION:
+        log.warning("database schema is newer than this code", extra={"fields": {
+            "db_version": version, "code_version": SCHEMA_VERSION}})
+        return version
+    if not app.config.get('SCHEMA_AUTO_UPGRADE'):
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {SCHEMA_VERSION}. Run 'flask db-upgrade'."
+        )
+    applied = upgrade(db.engine)
+    log.info("database schema upgraded", extra={"fields": {"from": version, "to": SCHEMA_VERSION, "steps": applied}})
+    return SCHEMA_VERSION
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def upgrade_command():
+    """Bring the configured database up to the current schema."""
+    before = current_version(db.engine)
+    applied = upgrade(db.engine)
+    click.echo(f"Schema version {before or 0} -> {SCHEMA_VERSION}; applied {len(applied)} step(s).")
+    for name in applied:
+        click.echo(f"  {name}")
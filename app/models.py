@@ -1,13 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column, DeclarativeBase
-from sqlalchemy import Column, String, ForeignKey, DATE, DateTime, func
-from datetime import date, datetime
+from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column, DeclarativeBase, validates
+from sqlalchemy import Column, String, Text, ForeignKey, DATE, DateTime, Index, func, text
+from datetime import date, datetime, timezone
+from app.utils.db import RoutingSession
 
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+# reads of GET requests may go to a 'replica' bind, see RoutingSession
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+
+def normalize_email(email):
+    return email.strip().lower() if isinstance(email, str) else email
+
 
 class User(Base):
     __tablename__ = 'users'
@@ -18,12 +24,62 @@ class User(Base):
     password: Mapped[str] = mapped_column(String(500), nullable=False)
     role: Mapped[str] = mapped_column(String(120), nullable=False, default='user')
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
-       
+
+    @validates('email')
+    def _normalize_email(self, key, email):
+        # Emails are stored in canonical form so lookups can use the plain
+        # unique index on users.email instead of scanning with lower().
+        return normalize_email(email)
+
+
+PREVIEW_LENGTH = 200
+
+
+def make_preview(message):
+    """First PREVIEW_LENGTH characters of a message, cut at a word boundary."""
+    if not isinstance(message, str):
+        return ''
+    flat = ' '.join(message.split())
+    if len(flat) <= PREVIEW_LENGTH:
+        return flat
+    cut = flat[:PREVIEW_LENGTH - 1].rsplit(' ', 1)[0]
+    return cut + '…'
+
        
 class PastorMessage(Base):
     __tablename__ = 'pastor_messages'
    
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
-    message: Mapped[str] = mapped_column(String(1000), nullable=False)
+    # Bodies are unbounded and only loaded when asked for; list views read preview.
+    message: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)
+    preview: Mapped[str] = mapped_column(String(PREVIEW_LENGTH), nullable=False, default='', server_default='')
     is_active: Mapped[bool] = mapped_column(nullable=False, default=True)
+    # Optional schedule: live from publish_at until expire_at (naive UTC).
+    publish_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    expire_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    @validates('message')
+    def _update_preview(self, key, message):
+        self.preview = make_preview(message)
+        return message
+
+    @validates('publish_at', 'expire_at')
+    def _naive_utc(self, key, when):
+        # Stored without tzinfo so comparisons against the schedule never mix
+        # aware and naive datetimes.
+        if isinstance(when, datetime) and when.tzinfo is not None:
+            return when.astimezone(timezone.utc).replace(tzinfo=None)
+        return when
+
+
+# At most one pastor message may be active. The partial index also keeps the
+# active-message lookup and the "deactivate the previous one" UPDATE to a
+# single-row index seek instead of a scan of the whole archive.
+pastor_message_active_index = Index(
+    'uq_pastor_messages_active',
+    PastorMessage.is_active,
+    unique=True,
+    sqlite_where=text('is_active = 1'),
+    postgresql_where=text('is_active'),
+)
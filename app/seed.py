@@ -0,0 +1,150 @@
+"""Synthetic users and pastor messages for scale testing (``flask seed``).
+
+Rows are generated from one seeded RNG, so the same arguments always produce
+the same data, and written with executemany Core inserts, one transaction
+per chunk, bypassing the ORM unit of work.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, func, update
+from app.models import db, User, PastorMessage, make_preview
+from app.migrations import upgrade
+from app.blueprints.pastor_messages.search import build_search_index
+from app.utils.passwords import hasher
+
+
+FIRST_NAMES = ('mary', 'john', 'ruth', 'peter', 'martha', 'paul', 'anna', 'james', 'esther', 'luke',
+               'lydia', 'mark', 'naomi', 'thomas', 'grace', 'david', 'sarah', 'samuel', 'hannah', 'philip')
+LAST_NAMES = ('schmidt', 'mueller', 'johnson', 'olson', 'anderson', 'larson', 'nelson', 'meyer',
+              'peterson', 'hansen', 'wagner', 'becker', 'carlson', 'fischer', 'lindqvist', 'weber')
+DOMAINS = ('example.com', 'example.org', 'mail.example.net')
+WORDS = ('grace', 'peace', 'faith', 'hope', 'love', 'advent', 'easter', 'lent', 'psalm', 'gospel',
+         'community', 'prayer', 'worship', 'service', 'joy', 'light', 'mercy', 'sunday', 'choir',
+         'fellowship', 'harvest', 'baptism', 'communion', 'youth', 'mission', 'neighbor', 'blessing')
+TITLES = ('A word for {season}', 'Notes from the pastor: {word}', '{Season} reflections', 'On {word} and {word2}')
+SEASONS = ('advent', 'christmas', 'epiphany', 'lent', 'easter', 'pentecost', 'the summer', 'harvest')
+
+# precomputed mode hashes this many passwords once and cycles through them
+PASSWORD_POOL = 16
+SEED_EPOCH = datetime(2020, 1, 1)
+
+
+def _sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def user_rows(rng, start, count, password_hash):
+    """Rows for users start..start+count-1; password_hash(n) gives user n's hash."""
+    rows = []
+    for n in range(start, start + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append({
+            "username": f"{first.capitalize()} {last.capitalize()}",
+            "email": f"{first}.{last}{n}@{rng.choice(DOMAINS)}",
+            "password": password_hash(n),
+            "role": "admin" if rng.random() < 0.01 else "user",
+            "created_at": SEED_EPOCH + timedelta(minutes=rng.randrange(6 * 365 * 24 * 60)),
+        })
+    return rows
+
+
+def message_rows(rng, start, count):
+    rows = []
+    for n in range(start, start + count):
+        season, word = rng.choice(SEASONS), rng.choice(WORDS)
+        title = rng.choice(TITLES).format(season=season, Season=season.capitalize(), word=word, word2=rng.choice(WORDS))
+        body = "\n\n".join(" ".join(_sentence(rng) for _ in range(rng.randint(2, 6))) for _ in range(rng.randint(1, 5)))
+        rows.append({
+            "title": title,
+            "message": body,
+            "preview": make_preview(body),
+            "is_active": False,
+        })
+    return rows
+
+
+def _insert_chunked(engine, table, total, chunk, make_rows, label, progress):
+    started = time.perf_counter()
+    done = 0
+    while done < total:
+        size = min(chunk, total - done)
+        rows = make_rows(done, size)
+        with engine.begin() as conn:
+            conn.execute(insert(table), rows)
+        done += size
+        if progress:
+            elapsed = time.perf_counter() - started
+            progress(label, done, total, done / elapsed if elapsed else 0.0)
+    return done
+
+
+def seed_database(engine, users=0, messages=0, rng_seed=42, chunk=5000, hash_mode='precomputed', progress=None):
+    """Append ``users`` users and ``messages`` messages; returns counts and timings.
+
+    Emails carry the row number (continuing after rows already present), so
+    repeated runs never collide on the unique index.
+    """
+    rng = random.Random(rng_seed)
+    summary = {}
+
+    with engine.connect() as conn:
+        user_offset = conn.execute(select(func.coalesce(func.max(User.id), 0))).scalar()
+        message_offset = conn.execute(select(func.coalesce(func.max(PastorMessage.id), 0))).scalar()
+
+    if users:
+        pool = None
+        if hash_mode == 'precomputed':
+            # hashing would otherwise dominate; every user shares one of a few hashes
+            pool = hasher.hash_many([f"password{i}" for i in range(PASSWORD_POOL)])
+
+        def make_users(done, size):
+            start = user_offset + done
+            if pool:
+                return user_rows(rng, start, size, lambda n: pool[n % PASSWORD_POOL])
+            hashes = hasher.hash_many([f"password{n}" for n in range(start, start + size)])
+            return user_rows(rng, start, size, lambda n: hashes[n - start])
+
+        started = time.perf_counter()
+        _insert_chunked(engine, User.__table__, users, chunk, make_users, 'users', progress)
+        summary['users'] = {"rows": users, "seconds": round(time.perf_counter() - started, 2)}
+
+    if messages:
+        started = time.perf_counter()
+        _insert_chunked(engine, PastorMessage.__table__, messages, chunk,
+                        lambda done, size: message_rows(rng, message_offset + done, size), 'messages', progress)
+        with engine.begin() as conn:
+            # bulk inserts bypass the routes that keep these up to date
+            build_search_index(conn)
+            if conn.execute(select(PastorMessage.id).where(PastorMessage.is_active == True)).first() is None:
+                newest = conn.execute(select(func.max(PastorMessage.id))).scalar()
+                conn.execute(update(PastorMessage).where(PastorMessage.id == newest).values(is_active=True))
+        summary['messages'] = {"rows": messages, "seconds": round(time.perf_counter() - started, 2)}
+
+    return summary
+
+
+@click.command('seed')
+@click.option('--users', default=10000, show_default=True, help='Users to add.')
+@click.option('--messages', default=1000, show_default=True, help='Pastor messages to add.')
+@click.option('--seed', 'rng_seed', default=42, show_default=True, help='RNG seed; same seed, same rows.')
+@click.option('--chunk', default=5000, show_default=True, help='Rows per insert transaction.')
+@click.option('--hash-mode', type=click.Choice(['precomputed', 'real']), default='precomputed', show_default=True,
+              help="'precomputed' reuses a few hashes (password0..password15); 'real' hashes password<n> per user.")
+@click.option('--reset', is_flag=True, help='Drop all tables first.')
+@with_appcontext
+def seed_command(users, messages, rng_seed, chunk, hash_mode, reset):
+    """Fill the configured database with synthetic users and pastor messages."""
+    if reset:
+        db.drop_all()
+    upgrade(db.engine)
+
+    def progress(label, done, total, rate):
+        click.echo(f"\r{label}: {done:,}/{total:,} rows ({rate:,.0f} rows/s)", nl=done == total)
+
+    summary = seed_database(db.engine, users, messages, rng_seed, chunk, hash_mode, progress)
+    for label, stats in summary.items():
+        click.echo(f"{label}: {stats['rows']:,} rows in {stats['seconds']}s")
@@ -4,6 +4,11 @@ from datetime import datetime, timedelta, timezone
 from app.models import User
 from functools import wraps
 from flask import request, jsonify
+from app.utils.metrics import metrics
+from app.utils.timing import span
+from collections import OrderedDict
+import threading
+import time
 import os
 
 
@@ -20,26 +25,115 @@ def encode_token (user_id, role):
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     return token
 
+
+class VerifiedTokenCache:
+    """Bounded LRU of tokens whose signature and claims were already checked.
+
+    Entries remember the token's ``exp`` and are dropped once it passes, so a
+    cached token never outlives the JWT itself.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] <= now:
+                del self._entries[token]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, token, exp, user_id, role):
+        if not exp or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (exp, user_id, role)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+token_cache = VerifiedTokenCache()
+metrics.add_collector('auth_token_cache_hits_total', 'counter',
+                      'Requests authenticated from the verified-token cache.', lambda: token_cache.hits)
+metrics.add_collector('auth_token_cache_misses_total', 'counter',
+                      'Requests that needed a full jwt.decode.', lambda: token_cache.misses)
+
+
+def init_auth(app):
+    token_cache.maxsize = app.config.get('AUTH_TOKEN_CACHE_SIZE', token_cache.maxsize)
+
+
+def _verify_token(token):
+    """Return (user_id, role) for a valid token, using the cache when possible."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    try:
+        user_id = int(data['sub'])
+    except (KeyError, TypeError, ValueError):
+        raise jose.exceptions.JWTClaimsError("Token subject is invalid")
+    role = data.get('role', 'user')
+    token_cache.put(token, data.get('exp'), user_id, role)
+    return user_id, role
+
+
+def _authenticate(admin=False):
+    """Shared core of token_required/admin_required.
+
+    Sets request.user_id/request.user_role and returns None on success,
+    otherwise the error response to send.
+    """
+    header = request.headers.get('Authorization')
+    if not header:
+        return jsonify({"message": "Token is missing!"}), 401
+
+    parts = header.split()
+    if len(parts) != 2 or parts[0].lower() != 'bearer':
+        return jsonify({"message": "Authorization header must be 'Bearer <token>'."}), 401
+
+    try:
+        with span('auth'):
+            request.user_id, request.user_role = _verify_token(parts[1])
+    except jose.exceptions.ExpiredSignatureError:
+        return jsonify({"error": "Token has expired!"}), 403
+    except jose.exceptions.JWTError:
+        return jsonify({"error": "Token is invalid!"}), 403
+
+    if admin and request.user_role != 'admin':
+        return jsonify({"message": "Admin access required!"}), 403
+    return None
+
+
 def token_required(f):
     @wraps(f)
     def decoration(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split()[1]
-        
-        if not token:
-            return jsonify({"message": "Token is missing!"}), 401
-        
-        try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            request.user_id = int(data['sub'])
-            request.user_role = data.get('role', 'user')  
-
-        except jose.exceptions.ExpiredSignatureError:
-            return jsonify({"error": "Token has expired!"}), 403
-        except jose.exceptions.JWTError:
-            return jsonify({"error": "Token is invalid!"}), 403
-        
+        error = _authenticate()
+        if error:
+            return error
         return f(*args, **kwargs)
     return decoration
 
@@ -47,25 +141,24 @@ def token_required(f):
 def admin_required(f):
     @wraps(f)
     def decoration(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split()[1]
-        
-        if not token:
-            return jsonify({"message": "Token is missing!"}), 401
-        
-        try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            request.user_id = int(data['sub'])
-            request.user_role = data.get('role', 'user')
-            
-            if request.user_role != 'admin':
-                return jsonify({"message": "Admin access required!"}), 403
-
-        except jose.exceptions.ExpiredSignatureError:
-            return jsonify({"error": "Token has expired!"}), 403
-        except jose.exceptions.JWTError:
-            return jsonify({"error": "Token is invalid!"}), 403
-        
+        error = _authenticate(admin=True)
+        if error:
+            return error
         return f(*args, **kwargs)
     return decoration
+
+
+def is_admin_request():
+    """True when the current request carries a valid admin bearer token.
+
+    A side-effect-free check for hooks outside the decorated views: no error
+    response, no auth span, and request.user_id/user_role are left unset.
+    """
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2 or parts[0].lower() != 'bearer':
+        return False
+    try:
+        _, role = _verify_token(parts[1])
+    except jose.exceptions.JWTError:
+        return False
+    return role == 'admin'
@@ -0,0 +1,65 @@
+from functools import lru_cache
+from flask import request, current_app
+
+
+class CorsPolicy:
+    """CORS handling with every header value built once at startup.
+
+    Origins may be exact strings or compiled regexes; the allow decision for
+    each Origin seen is memoized in a bounded LRU so the regex runs once per
+    distinct origin, not once per response. Preflights are answered directly
+    with Access-Control-Max-Age so browsers can skip repeating them.
+    """
+
+    def __init__(self, origins, allow_headers, methods, expose_headers=(), max_age=600, cache_size=256):
+        self._exact = frozenset(o for o in origins if isinstance(o, str) and o)
+        self._patterns = tuple(o for o in origins if not isinstance(o, str))
+        self.allow_headers = ", ".join(allow_headers)
+        self.allow_methods = ", ".join(m.upper() for m in methods)
+        self.expose_headers = ", ".join(expose_headers)
+        self.max_age = str(int(max_age))
+        self.is_allowed = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, origin):
+        return origin in self._exact or any(p.match(origin) for p in self._patterns)
+
+    def init_app(self, app):
+        # registered first so preflights short-circuit every other before_request;
+        # the app's own after_request calls add_headers() for normal responses
+        app.before_request_funcs.setdefault(None, []).insert(0, self._handle_preflight)
+
+    def _set_origin_headers(self, response, origin):
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.vary.add("Origin")
+
+    def _handle_preflight(self):
+        if request.method != "OPTIONS" or "Access-Control-Request-Method" not in request.headers:
+            return None
+        origin = request.headers.get("Origin")
+        if not origin or not self.is_allowed(origin):
+            return None
+        response = current_app.response_class("", 200)
+        self._set_origin_headers(response, origin)
+        response.headers["Access-Control-Allow-Methods"] = self.allow_methods
+        response.headers["Access-Control-Allow-Headers"] = self.allow_headers
+        response.headers["Access-Control-Max-Age"] = self.max_age
+        response._cors_preflight = True
+        return response
+
+    def add_headers(self, response):
+        """Add the origin/credential/expose headers for an allowed Origin.
+
+        Vary: Origin goes on every response, allowed origin or not, so a
+        shared cache never hands a copy made without CORS headers to an
+        allowed origin, or the other way round.
+        """
+        if getattr(response, "_cors_preflight", False):
+            return response
+        response.vary.add("Origin")
+        origin = request.headers.get("Origin")
+        if origin and self.is_allowed(origin):
+            self._set_origin_headers(response, origin)
+            if self.expose_headers:
+                response.headers["Access-Control-Expose-Headers"] = self.expose_headers
+        return response
@@ -0,0 +1,246 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, TextClause, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import metrics
+
+
+log = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection."""
+
+    _instances = weakref.WeakSet()
+    # log under SQLAlchemy's own pool logger, not the app's 'app.*' hierarchy
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self._stats_lock = threading.Lock()
+        TimedQueuePool._instances.add(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_wait_total += waited
+                self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+    def stats(self):
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "capacity": capacity,
+            "checked_out": checked_out,
+            "overflow": max(self.overflow(), 0),
+            "utilization": round(checked_out / capacity, 3) if capacity else None,
+            "checkouts": self.checkouts,
+            "checkout_wait_ms_total": round(self.checkout_wait_total * 1000, 3),
+            "checkout_wait_ms_max": round(self.checkout_wait_max * 1000, 3),
+        }
+
+
+def pool_stats():
+    """Stats for every timed pool in this process (one per engine/bind)."""
+    return [pool.stats() for pool in list(TimedQueuePool._instances)]
+
+
+def _pool_total(key):
+    return lambda: sum(s[key] for s in pool_stats())
+
+
+metrics.add_collector('db_pool_checked_out', 'gauge',
+                      'Connections currently checked out of the pool.', _pool_total('checked_out'))
+metrics.add_collector('db_pool_capacity', 'gauge',
+                      'pool_size + max_overflow; utilization = checked_out / capacity.', _pool_total('capacity'))
+metrics.add_collector('db_pool_checkouts_total', 'counter',
+                      'Connection checkouts.', _pool_total('checkouts'))
+metrics.add_collector('db_pool_checkout_wait_seconds_total', 'counter',
+                      'Time spent waiting for a pooled connection.',
+                      lambda: sum(s['checkout_wait_ms_total'] for s in pool_stats()) / 1000)
+
+
+def _engine_options(uri, configured):
+    url = make_url(uri)
+    options = dict(configured)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # SingletonThreadPool doesn't take the QueuePool sizing knobs
+        for key in ('pool_size', 'max_overflow', 'pool_timeout'):
+            options.pop(key, None)
+    else:
+        options.setdefault('poolclass', TimedQueuePool)
+    return options
+
+
+def configure_engine_options(app):
+    """Fill in engine options before db.init_app() builds the engines.
+
+    File-backed databases get the timed pool so checkout waits are visible;
+    in-memory SQLite keeps SQLAlchemy's default single-connection pool.
+    Flask-SQLAlchemy doesn't apply SQLALCHEMY_ENGINE_OPTIONS to binds, so
+    URL-only binds (the replica) get the same options here.
+    """
+    configured = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app.config['SQLALCHEMY_DATABASE_URI'], configured)
+    binds = {}
+    for key, value in (app.config.get('SQLALCHEMY_BINDS') or {}).items():
+        if isinstance(value, str):
+            value = dict(_engine_options(value, configured), url=value)
+        binds[key] = value
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def install_sqlite_pragmas(app, engines):
+    """Apply SQLITE_PRAGMAS (WAL, synchronous, busy_timeout, mmap_size) on every new connection."""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    for engine in engines:
+        if engine.dialect.name != 'sqlite':
+            continue
+
+        @event.listens_for(engine, 'connect')
+        def _set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+
+
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+
+def replica_lag(engine):
+    """Seconds the replica is behind the primary, or None when the backend can't tell."""
+    if engine.dialect.name != 'postgresql':
+        return None
+    with engine.connect() as conn:
+        # an idle primary sends no WAL, so fully replayed counts as caught up
+        lag = conn.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )).scalar()
+    return None if lag is None else float(lag)
+
+
+class ReplicaRouter:
+    """Decides whether read-only requests may use the 'replica' bind.
+
+    The replica's lag is probed at most every REPLICA_LAG_CHECK_INTERVAL
+    seconds per process; while it is over REPLICA_MAX_LAG_SECONDS, or the
+    probe fails, reads fall back to the primary.
+    """
+
+    def __init__(self, probe=replica_lag):
+        self.probe = probe
+        self.max_lag = None
+        self.check_interval = 1.0
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self._healthy = True
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS')
+        self.check_interval = app.config.get('REPLICA_LAG_CHECK_INTERVAL', self.check_interval)
+        self._checked = 0.0
+        self._healthy = True
+
+    def replica_usable(self, engine):
+        if self.max_lag is None:
+            return True
+        if time.monotonic() - self._checked >= self.check_interval and self._lock.acquire(blocking=False):
+            # one request re-probes; the others use the last answer meanwhile
+            try:
+                lag = self.probe(engine)
+                self._healthy = lag is None or lag <= self.max_lag
+            except Exception:
+                log.warning("replica lag probe failed; reading from the primary", exc_info=True)
+                self._healthy = False
+            finally:
+                self._checked = time.monotonic()
+                self._lock.release()
+        return self._healthy
+
+
+replica_router = ReplicaRouter()
+
+metrics.add_collector('db_replica_reads_total', 'counter',
+                      'Session binds routed to the read replica.', lambda: replica_router.replica_reads)
+metrics.add_collector('db_replica_fallbacks_total', 'counter',
+                      'Replica-eligible reads sent to the primary because of lag.', lambda: replica_router.primary_fallbacks)
+
+
+def _is_read(clause):
+    if clause is None or isinstance(clause, Select):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith('SELECT')
+    return False
+
+
+@contextmanager
+def primary_reads(session):
+    """Send the session's reads inside the block to the primary.
+
+    For anything that fills a cache shared beyond this request: a lagging
+    replica would otherwise pin a stale copy until the next invalidation.
+    """
+    previous = session.info.get('primary_reads', False)
+    session.info['primary_reads'] = True
+    try:
+        yield
+    finally:
+        session.info['primary_reads'] = previous
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of GET/HEAD requests to the 'replica' bind.
+
+    Everything else (other methods, DML, CLI commands, migrations) uses the
+    primary. Once the session has written anything it stays on the primary
+    for the rest of the request, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._route_to_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            self.info['pinned_primary'] = True
+        super().flush(objects)
+
+    def _route_to_replica(self, clause):
+        if self.info.get('pinned_primary') or self.info.get('primary_reads') or REPLICA_BIND not in self._db.engines:
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if not _is_read(clause):
+            self.info['pinned_primary'] = True
+            return False
+        if not replica_router.replica_usable(self._db.engines[REPLICA_BIND]):
+            replica_router.primary_fallbacks += 1
+            return False
+        replica_router.replica_reads += 1
+        return True
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from flask import Response, request, stream_with_context, current_app
+from app.models import db
+
+
+EXPORT_MIMETYPES = ['application/x-ndjson', 'text/csv']
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def export_response(stmt, filename):
+    """Stream the rows of a Core select as NDJSON or CSV (chosen by Accept).
+
+    Rows come from a server-side cursor in yield_per batches and each batch is
+    written out as soon as it is fetched, so memory stays flat however many
+    rows there are and the client starts receiving data right away.
+    """
+    mimetype = request.accept_mimetypes.best_match(EXPORT_MIMETYPES, default=EXPORT_MIMETYPES[0])
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    columns = [c.key for c in stmt.selected_columns]
+
+    def generate():
+        if mimetype == 'text/csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            if mimetype == 'text/csv':
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(partition)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({k: _jsonable(v) for k, v in zip(columns, row)}) + "\n" for row in partition
+                )
+
+    extension = 'csv' if mimetype == 'text/csv' else 'ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from flask import request
+from sqlalchemy.orm import load_only
+from app.utils.serializers import RowSerializer
+
+
+class FieldSetError(ValueError):
+    """Raised for an unknown name in ?fields=; routes turn it into a 400."""
+
+
+class FieldSets:
+    """Sparse fieldset support (?fields=a,b) for one schema/model pair.
+
+    Validates the requested names against the schema's dump fields, builds the
+    matching load_only() option so unused columns are never SELECTed, and
+    keeps one only= schema (wrapped in a RowSerializer) per distinct field set.
+    """
+
+    def __init__(self, schema_class, model):
+        self.schema_class = schema_class
+        self.model = model
+        self.allowed = frozenset(schema_class().dump_fields)
+
+    def parse(self):
+        """Return a sorted tuple of requested field names, or None for all fields."""
+        raw = request.args.get('fields')
+        if not raw:
+            return None
+        names = tuple(sorted({name.strip() for name in raw.split(',') if name.strip()}))
+        unknown = [name for name in names if name not in self.allowed]
+        if unknown:
+            raise FieldSetError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(sorted(self.allowed))}.")
+        return names or None
+
+    def load_only(self, names):
+        return load_only(*(getattr(self.model, name) for name in names))
+
+    @lru_cache(maxsize=64)
+    def serializer(self, names):
+        return RowSerializer(self.schema_class(only=names))
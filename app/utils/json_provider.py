@@ -0,0 +1,70 @@
+import re
+from flask.json.provider import DefaultJSONProvider
+from app.utils.timing import span
+
+try:
+    import orjson
+except ImportError:  # optional; Flask's stdlib provider is used without it
+    orjson = None
+
+# what json.dumps(ensure_ascii=True) escapes beyond the control characters orjson already does
+_NOT_PRINTABLE_ASCII = re.compile('[\x7f-\U0010ffff]')
+
+
+def _escape(match):
+    code = ord(match.group())
+    if code > 0xFFFF:
+        code -= 0x10000
+        return '\\u%04x\\u%04x' % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u%04x' % code
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed.
+
+    Keeps Flask's conventions (sorted keys, indent in debug, compact
+    otherwise, the same ``default`` for dates and decimals, ``ensure_ascii``
+    escapes) and falls back to the stdlib implementation when orjson is
+    missing, cannot encode the value (ints wider than 64 bits) or a call
+    passes stdlib specific keyword arguments. Floats are the one known
+    difference: orjson writes ``1e16`` where the stdlib writes ``1e+16``.
+    """
+
+    def _options(self, indent=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        if orjson is not None:
+            try:
+                body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+            except orjson.JSONEncodeError:
+                pass  # e.g. big ints; the stdlib encodes them (or raises the same TypeError)
+            else:
+                if body.isascii() and b"\x7f" not in body:
+                    return body
+                # orjson writes raw UTF-8; match the stdlib's ensure_ascii escapes
+                return _NOT_PRINTABLE_ASCII.sub(_escape, body.decode()).encode()
+        kwargs = {"indent": 2} if indent else {"separators": (",", ":")}
+        return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        with span('serialize'):
+            body = self.dumps_bytes(obj, indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,93 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, msg plus any ``fields``."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep only a fraction of records logged with ``extra={'sampled': True}``.
+
+    Used for the high-volume per-request lines; warnings and errors are never
+    dropped.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno >= logging.WARNING or not getattr(record, 'sampled', False):
+            return True
+        return random.random() < self.rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Only resolve what can't safely cross threads; the listener thread
+        # does the JSON formatting and the actual write.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def configure_logging(app):
+    """Route the 'app' logger through a queue drained by a background listener.
+
+    Request threads only enqueue a record, so logging never blocks on stdout.
+    Level and sampling come from LOG_LEVEL / LOG_SAMPLE_RATE.
+    """
+    global _listener
+
+    logger = logging.getLogger('app')
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SampleFilter(app.config.get('LOG_SAMPLE_RATE', 1.0)))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    logger.addHandler(queue_handler)
+    logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    logger.propagate = False
+
+
+@atexit.register
+def _flush_logs():
+    if _listener is not None:
+        _listener.stop()
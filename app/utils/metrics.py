@@ -0,0 +1,239 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows; multi-process metrics are for gunicorn
+    fcntl = None
+
+
+# Latency bucket upper bounds in seconds (Prometheus client defaults).
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# histograms and counters of workers that have exited, so totals never go backwards
+EXITED_FILE = 'exited_workers.json'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Per-process request latency histograms, request counts and in-flight gauge.
+
+    Each observation takes one short lock and bumps a few list slots. For
+    multi-worker servers every process periodically writes its snapshot to
+    ``<directory>/metrics_<pid>.json``; /metrics sums the live snapshot of the
+    serving worker with the files of all the others. The files of exited
+    workers are folded into ``exited_workers.json`` and removed, so their
+    counts survive and a reused pid starts from a fresh file.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.directory = None
+        self.flush_interval = 5.0
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._in_flight = 0
+        self._collectors = []
+        self._last_flush = 0.0
+        self._flushed_pid = None
+
+    def init_app(self, app):
+        if app.config.get('METRICS_MULTIPROCESS'):
+            self.directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+            os.makedirs(self.directory, exist_ok=True)
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+
+    def add_collector(self, name, kind, help_text, fn):
+        """Register a callable sampled at snapshot time and summed across workers."""
+        self._collectors.append((name, kind, help_text, fn))
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def observe(self, endpoint, status_code, seconds):
+        key = (endpoint or 'unmatched', f"{status_code // 100}xx")
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # one count per bucket, then +Inf, then the running sum
+                hist = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            hist[slot] += 1
+            hist[-1] += seconds
+            self._in_flight -= 1
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [[endpoint, status] + list(values)
+                          for (endpoint, status), values in self._histograms.items()]
+            in_flight = self._in_flight
+        collected = {}
+        for name, kind, help_text, fn in self._collectors:
+            try:
+                collected[name] = fn()
+            except Exception:
+                continue
+        return {"pid": os.getpid(), "histograms": histograms, "in_flight": in_flight, "collected": collected}
+
+    def flush(self):
+        """Write this worker's snapshot atomically so other workers can read it."""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        if self._flushed_pid != os.getpid():
+            # a file already here belongs to an exited worker that had our pid
+            if os.path.exists(path):
+                self._fold_exited([path], reused_pid=True)
+            self._flushed_pid = os.getpid()
+        self._write(path, self.snapshot())
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path, snapshot):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(snapshot, fh)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.directory, ".lock"), "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            yield
+
+    def _fold_exited(self, paths, reused_pid=False):
+        """Add exited workers' histograms and counters to EXITED_FILE and delete their files.
+
+        Runs under a directory lock, and re-reads each file inside it, so a
+        file another worker has already folded is never counted twice.
+        """
+        counters = {name for name, kind, _, _ in self._collectors if kind == 'counter'}
+        exited_path = os.path.join(self.directory, EXITED_FILE)
+        with self._locked():
+            exited = self._read(exited_path) or {"pid": None, "histograms": [], "in_flight": 0, "collected": {}}
+            histograms = {(row[0], row[1]): row[2:] for row in exited["histograms"]}
+            folded = []
+            for path in paths:
+                snap = self._read(path)
+                if snap is None or (not reused_pid and _pid_alive(snap.get("pid", 0))):
+                    continue
+                for row in snap.get("histograms", []):
+                    merged = histograms.setdefault((row[0], row[1]), [0] * (len(row) - 2))
+                    if len(merged) == len(row) - 2:
+                        histograms[(row[0], row[1])] = [a + b for a, b in zip(merged, row[2:])]
+                # gauges (in flight, pool usage) died with the worker
+                for name, value in snap.get("collected", {}).items():
+                    if name in counters:
+                        exited["collected"][name] = exited["collected"].get(name, 0) + value
+                folded.append(path)
+            if not folded:
+                return
+            exited["histograms"] = [[endpoint, status] + values for (endpoint, status), values in histograms.items()]
+            self._write(exited_path, exited)
+            for path in folded:
+                os.remove(path)
+
+    def _all_snapshots(self):
+        snapshots = [self.snapshot()]
+        if not self.directory:
+            return snapshots
+        own_pid = os.getpid()
+        exited = []
+        for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+            snap = self._read(path)
+            if snap is None or snap.get("pid") == own_pid:
+                continue
+            if _pid_alive(snap.get("pid", 0)):
+                snapshots.append(snap)
+            else:
+                exited.append(path)
+        if exited:
+            self._fold_exited(exited)
+        snap = self._read(os.path.join(self.directory, EXITED_FILE))
+        if snap is not None:
+            snapshots.append(snap)
+        return snapshots
+
+    def render(self):
+        """Aggregate all workers and return Prometheus text exposition format."""
+        histograms = {}
+        in_flight = 0
+        collected = {}
+        for snap in self._all_snapshots():
+            in_flight += snap.get("in_flight", 0)
+            for row in snap.get("histograms", []):
+                key, values = (row[0], row[1]), row[2:]
+                if len(values) != len(self.buckets) + 2:
+                    continue
+                merged = histograms.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, v in enumerate(values):
+                    merged[i] += v
+            for name, value in snap.get("collected", {}).items():
+                collected[name] = collected.get(name, 0) + value
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by endpoint and status class.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        totals = []
+        for (endpoint, status), values in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f"http_request_duration_seconds_bucket"
+                             f"{_labels(endpoint=endpoint, status=status, le=bound)} {cumulative}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(endpoint=endpoint, status=status)} {values[-1]}")
+            lines.append(f"http_request_duration_seconds_count{_labels(endpoint=endpoint, status=status)} {cumulative}")
+            totals.append(f"http_requests_total{_labels(endpoint=endpoint, status=status)} {cumulative}")
+
+        lines += ["# HELP http_requests_total Completed requests by endpoint and status class.",
+                  "# TYPE http_requests_total counter"] + totals
+        lines += ["# HELP http_requests_in_flight Requests currently being served.",
+                  "# TYPE http_requests_in_flight gauge",
+                  f"http_requests_in_flight {in_flight}"]
+        for name, kind, help_text, _ in self._collectors:
+            if name in collected:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {collected[name]}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@atexit.register
+def _flush_metrics():
+    metrics.flush()
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+import logging
+from flask import current_app
+
+
+log = logging.getLogger(__name__)
+
+
+class ChangeNotifier:
+    """Tells everyone in this process, and in sibling workers, that something changed.
+
+    In-process, waiters block on one shared Condition and a version counter,
+    so one change wakes them all. On the gevent workers from gunicorn.conf.py
+    a waiter is a parked greenlet, not an OS thread. Across workers, ``publish`` also rewrites a small
+    version file under instance/; one watcher thread per process polls its
+    mtime and wakes local waiters (and runs the registered callbacks) when a
+    sibling published.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.version = 0
+        self._cond = threading.Condition()
+        self._callbacks = []
+        self._path = None
+        self._interval = 1.0
+        self._seen_stamp = None
+        self._watcher_pid = None
+        self._app = None
+
+    def on_change(self, fn=None, remote_only=False):
+        """Register fn() to run whenever a change is seen.
+
+        With remote_only=True it only runs for changes published by another
+        worker, for state the local writer already updated itself.
+        """
+        if fn is None:
+            return lambda fn: self.on_change(fn, remote_only)
+        self._callbacks.append((fn, remote_only))
+        return fn
+
+    def start(self):
+        """Start this process's watcher thread once (forked workers get their own)."""
+        if self._watcher_pid == os.getpid():
+            return
+        with self._cond:
+            if self._watcher_pid == os.getpid():
+                return
+            self._app = current_app._get_current_object()
+            self._path = os.path.join(current_app.instance_path, f"{self.name}.version")
+            self._interval = current_app.config.get('CHANGE_WATCH_INTERVAL', 1.0)
+            os.makedirs(current_app.instance_path, exist_ok=True)
+            self._seen_stamp = self._stamp()
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name=f"{self.name}-watcher", daemon=True).start()
+
+    def publish(self):
+        """Announce a change: wake local waiters now and tell the other workers."""
+        self.start()
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(f"{time.time_ns()} {os.getpid()}")
+        os.replace(tmp, self._path)
+        self._seen_stamp = self._stamp()
+        self._changed()
+
+    def wait(self, seen_version, timeout):
+        """Block until version moves past seen_version or timeout; return the version."""
+        with self._cond:
+            if self.version == seen_version:
+                self._cond.wait(timeout)
+            return self.version
+
+    def _changed(self, remote=False):
+        with self._cond:
+            self.version += 1
+            self._cond.notify_all()
+        for fn, remote_only in self._callbacks:
+            if remote_only and not remote:
+                continue
+            try:
+                fn()
+            except Exception:
+                log.exception("change callback failed", extra={"fields": {"notifier": self.name}})
+
+    def _stamp(self):
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _watch(self):
+        while True:
+            time.sleep(self._interval)
+            stamp = self._stamp()
+            if stamp != self._seen_stamp:
+                self._seen_stamp = stamp
+                # callbacks such as cache invalidation need the app bound
+                with self._app.app_context():
+                    self._changed(remote=True)
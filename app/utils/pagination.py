@@ -0,0 +1,89 @@
+import base64
+import binascii
+from urllib.parse import urlencode
+from flask import request, current_app
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised for a bad ?limit= or ?after= value; routes turn it into a 400."""
+
+
+def encode_cursor(last_id):
+    # Opaque to clients, but just the last primary key seen.
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, _, value = base64.urlsafe_b64decode(padded.encode()).decode().partition(":")
+        if prefix != "id":
+            raise ValueError(cursor)
+        return int(value)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise PaginationError("Invalid 'after' cursor.")
+
+
+def encode_rank_cursor(rank, last_id):
+    # For result lists ordered by (rank, id) rather than id alone.
+    return base64.urlsafe_b64encode(f"rank:{rank!r}:{last_id}".encode()).rstrip(b"=").decode()
+
+
+def decode_rank_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, rank, value = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        if prefix != "rank":
+            raise ValueError(cursor)
+        return float(rank), int(value)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise PaginationError("Invalid 'after' cursor.")
+
+
+def page_limit():
+    default = current_app.config.get('PAGE_SIZE_DEFAULT', DEFAULT_PAGE_SIZE)
+    maximum = current_app.config.get('PAGE_SIZE_MAX', MAX_PAGE_SIZE)
+    raw = request.args.get('limit')
+    if raw is None:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("'limit' must be an integer.")
+    if limit < 1:
+        raise PaginationError("'limit' must be at least 1.")
+    return min(limit, maximum)
+
+
+def paginate_by_pk(query, pk_column):
+    """Apply ?limit=&after= keyset pagination ordered by pk_column.
+
+    Seeks past the cursor with ``pk > after`` instead of an OFFSET, so every
+    page costs the same no matter how deep it is. Returns (rows, next_cursor);
+    next_cursor is None on the last page.
+    """
+    limit = page_limit()
+    after = request.args.get('after')
+    if after:
+        query = query.filter(pk_column > decode_cursor(after))
+
+    # fetch one extra row to learn whether another page exists
+    rows = query.order_by(pk_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(getattr(rows[-1], pk_column.key))
+    return rows, None
+
+
+def add_pagination_headers(response, next_cursor):
+    """Advertise the next page via X-Next-Cursor and a Link header."""
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,126 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated; routes answer 503."""
+
+
+def _hash_chunk(passwords, method):
+    return [generate_password_hash(pw, method) for pw in passwords]
+
+
+class PasswordHasher:
+    """Runs password hashing in a small, bounded process pool.
+
+    Hashing is the most CPU-expensive thing the service does. Doing it in
+    worker processes keeps request threads (and /health) responsive, and the
+    pending-job limit turns a signup burst into quick 503s instead of a pile
+    of stalled workers. With PASSWORD_HASH_WORKERS = 0 hashing runs inline.
+    """
+
+    # passwords per pool job in hash_many; a few hashes, well inside the timeout
+    chunk_size = 8
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 0
+        self.max_pending = 0
+        self.timeout = None
+        self._prefix = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.workers * 4)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT')
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(max(self.max_pending, 1))
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Created lazily so each forked gunicorn worker gets its own pool.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _submit(self, fn, *args, wait=False):
+        """Queue fn in the pool, holding a pending slot until the job itself is done.
+
+        A job that outlives the caller's timeout keeps running in the pool,
+        so its slot comes back from the future's callback, not the caller.
+        With wait=True a full queue is waited on for up to the timeout.
+        """
+        acquired = self._slots.acquire(timeout=self.timeout) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # frees the slot now if the job has not started yet
+            future.cancel()
+            raise HashingBusy()
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._result(self._submit(fn, *args))
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """Hash a batch in chunks of chunk_size, one pending slot per chunk.
+
+        At most ``workers`` chunks are queued at once, so the pool stays busy
+        while the other slots remain free for logins and signups. Each chunk
+        gets the usual timeout, and HashingBusy is raised when the first
+        chunk finds the queue full or any chunk times out.
+        """
+        if not self.workers:
+            return _hash_chunk(passwords, self.method)
+        hashes, inflight = [], deque()
+        try:
+            for start in range(0, len(passwords), self.chunk_size):
+                if len(inflight) == self.workers:
+                    hashes.extend(self._result(inflight.popleft()))
+                # later chunks wait for a slot; this batch's finished chunks are handing theirs back
+                inflight.append(self._submit(_hash_chunk, passwords[start:start + self.chunk_size],
+                                             self.method, wait=start > 0))
+            while inflight:
+                hashes.extend(self._result(inflight.popleft()))
+        except BaseException:
+            for future in inflight:
+                future.cancel()
+            raise
+        return hashes
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when pwhash was made with different cost settings than configured."""
+        if self._prefix is None:
+            # werkzeug expands short forms like 'scrypt' into full parameters,
+            # so learn the exact prefix it writes for the configured method.
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,126 @@
+import cProfile
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from flask import g, request
+from app.utils.auth import is_admin_request
+
+
+log = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.pstats'
+
+
+def _safe(name):
+    return re.sub(r'[^A-Za-z0-9_.]+', '_', name or 'unmatched')
+
+
+class RequestProfiler:
+    """Opt-in cProfile of sampled requests, dumped as pstats files.
+
+    A request is profiled with probability PROFILE_SAMPLE_RATE, or when an
+    admin sends the PROFILE_TRIGGER_HEADER. Each profile lands in
+    PROFILE_DIR as ``<ms>-<pid>-<endpoint>-<elapsed>ms.pstats``, loadable with
+    pstats, snakeviz or ``flameprof``. With PROFILING off no hooks are
+    installed at all.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.sample_rate = 0.0
+        self.trigger_header = 'X-Profile'
+        self.max_files = 200
+
+    def init_app(self, app):
+        self.directory = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        if not app.config.get('PROFILING'):
+            return
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', self.sample_rate)
+        self.trigger_header = app.config.get('PROFILE_TRIGGER_HEADER', self.trigger_header)
+        self.max_files = app.config.get('PROFILE_MAX_FILES', self.max_files)
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    def _wanted(self):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        return self.trigger_header in request.headers and is_admin_request()
+
+    def _start(self):
+        if not self._wanted():
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is already running in this process (3.12+)
+            return
+        g._profile = (profile, time.perf_counter())
+
+    def _stop(self, exc=None):
+        started = g.pop('_profile', None)
+        if started is None:
+            return
+        profile, start = started
+        profile.disable()
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        name = f"{int(time.time() * 1000)}-{os.getpid()}-{_safe(request.endpoint)}-{elapsed_ms}ms{PROFILE_SUFFIX}"
+        try:
+            profile.dump_stats(os.path.join(self.directory, name))
+            self._prune()
+        except OSError:
+            log.exception("could not write profile", extra={"fields": {"file": name}})
+
+    def _prune(self):
+        files = self.list_files()
+        for entry in files[self.max_files:]:
+            try:
+                os.remove(entry['path'])
+            except FileNotFoundError:
+                pass
+
+    def list_files(self):
+        """Profiles on disk, newest first, with metadata parsed from the name."""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(PROFILE_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            parts = name[:-len(PROFILE_SUFFIX)].split('-')
+            if len(parts) != 4:
+                continue
+            started_ms, pid, endpoint, elapsed = parts
+            entries.append({
+                "name": name,
+                "path": os.path.join(self.directory, name),
+                "started_ms": int(started_ms),
+                "pid": int(pid),
+                "endpoint": endpoint,
+                "elapsed_ms": int(elapsed.rstrip('ms')),
+            })
+        entries.sort(key=lambda e: e['started_ms'], reverse=True)
+        return entries
+
+    def aggregate(self, entries, top=15):
+        """Merge the given profiles into one pstats and return the top functions by cumulative time."""
+        if not entries:
+            return []
+        stats = pstats.Stats(*(e['path'] for e in entries))
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, callers) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": nc,
+                "self_ms": round(tt * 1000, 3),
+                "cumulative_ms": round(ct * 1000, 3),
+            })
+        rows.sort(key=lambda r: r['cumulative_ms'], reverse=True)
+        return rows[:top]
+
+
+profiler = RequestProfiler()
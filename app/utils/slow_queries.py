@@ -0,0 +1,152 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from flask import has_request_context, request
+from sqlalchemy import event
+from app.utils.metrics import metrics
+
+
+log = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')
+
+
+def normalize_sql(statement):
+    """Collapse literals, placeholder lists and whitespace so equal queries group together."""
+    sql = _STRING.sub("?", statement)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _type_names(params):
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+
+def parameter_shape(parameters, executemany):
+    """Types of the bound parameters, never their values."""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "each": _type_names(rows[0]) if rows else None}
+    return _type_names(parameters)
+
+
+class SlowQueryLog:
+    """Records statements slower than SLOW_QUERY_THRESHOLD_MS in a ring buffer.
+
+    Each entry carries the normalized SQL, parameter shape, duration, the
+    Flask endpoint that issued it and the query plan. Plans come from
+    EXPLAIN (QUERY PLAN on SQLite) run on a raw DBAPI cursor, so they don't
+    re-enter these events, and are refreshed at most every
+    SLOW_QUERY_EXPLAIN_INTERVAL seconds per normalized statement.
+    """
+
+    def __init__(self, size=200):
+        self.threshold = None
+        self.explain_interval = 300.0
+        self.total = 0
+        self._entries = deque(maxlen=size)
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engines=()):
+        threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+        if threshold_ms is None:
+            return
+        self.threshold = threshold_ms / 1000
+        self.explain_interval = app.config.get('SLOW_QUERY_EXPLAIN_INTERVAL', self.explain_interval)
+        size = app.config.get('SLOW_QUERY_LOG_SIZE', self._entries.maxlen)
+        if size != self._entries.maxlen:
+            self._entries = deque(self._entries, maxlen=size)
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before)
+            event.listen(engine, 'after_cursor_execute', self._after)
+
+    def entries(self):
+        """Recorded slow queries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold:
+            return
+        try:
+            self._record(conn, statement, parameters, executemany, elapsed)
+        except Exception:
+            log.exception("could not record slow query")
+
+    def _record(self, conn, statement, parameters, executemany, elapsed):
+        normalized = normalize_sql(statement)
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "endpoint": request.endpoint if has_request_context() else None,
+            "plan": self._plan(conn, normalized, statement, parameters, executemany),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.total += 1
+        log.warning("slow query", extra={"fields": {
+            k: entry[k] for k in ("duration_ms", "statement", "endpoint")}})
+
+    def _plan(self, conn, normalized, statement, parameters, executemany):
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        now = time.monotonic()
+        cached = self._plans.get(normalized)
+        if cached and now - cached[0] < self.explain_interval:
+            return cached[1]
+
+        if executemany:
+            parameters = next(iter(parameters), None)
+        sqlite = conn.dialect.name == 'sqlite'
+        prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+        # this is the request's own connection and transaction: on Postgres a
+        # failed statement aborts the whole transaction, so fence it in a savepoint
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters or ())
+                rows = cursor.fetchall()
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                plan = [f"EXPLAIN failed: {e}"]
+            else:
+                # SQLite: (id, parent, notused, detail); Postgres: one text column per line
+                plan = [row[-1] if sqlite else row[0] for row in rows]
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        finally:
+            cursor.close()
+        self._plans[normalized] = (now, plan)
+        return plan
+
+
+slow_queries = SlowQueryLog()
+
+metrics.add_collector('db_slow_queries_total', 'counter',
+                      'Statements slower than SLOW_QUERY_THRESHOLD_MS.', lambda: slow_queries.total)
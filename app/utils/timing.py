@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+
+# Spans of the request being handled in this thread/greenlet; None outside a
+# request or when SERVER_TIMING is off, which turns every hook into one lookup.
+_current = ContextVar('server_timing', default=None)
+
+
+class _Spans:
+    __slots__ = ('started', 'durations', 'open', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.open = set()
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the named span of the current request.
+
+    Nested spans of the same name count once, so e.g. a RowSerializer calling
+    the JSON provider is not double counted.
+    """
+    spans = _current.get()
+    if spans is None or name in spans.open:
+        yield
+        return
+    spans.open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.open.discard(name)
+        spans.add(name, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('server_timing_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = _current.get()
+    starts = conn.info.get('server_timing_start')
+    if spans is not None and starts:
+        spans.add('db', time.perf_counter() - starts.pop())
+        spans.queries += 1
+
+
+class ServerTiming:
+    """Per-request auth / db / serialize spans, sent as a Server-Timing header.
+
+    With SERVER_TIMING off nothing is registered: no request hooks, no cursor
+    listeners, and ``span`` finds no active request and does nothing.
+    """
+
+    def init_app(self, app, engines=()):
+        if not app.config.get('SERVER_TIMING'):
+            return
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._add_header)
+        app.teardown_request(self._finish)
+
+    def summary(self):
+        """Milliseconds per span (plus the query count) for the log line, or None."""
+        spans = _current.get()
+        if spans is None:
+            return None
+        out = {name: round(seconds * 1000, 3) for name, seconds in spans.durations.items()}
+        out['db_queries'] = spans.queries
+        return out
+
+    def _start(self):
+        _current.set(_Spans())
+
+    def _add_header(self, response):
+        spans = _current.get()
+        if spans is None:
+            return response
+        parts = []
+        for name, seconds in spans.durations.items():
+            part = f"{name};dur={seconds * 1000:.3f}"
+            if name == 'db':
+                part += f';desc="{spans.queries} queries"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - spans.started) * 1000:.3f}")
+        response.headers.add('Server-Timing', ", ".join(parts))
+        return response
+
+    def _finish(self, exc=None):
+        _current.set(None)
+
+
+server_timing = ServerTiming()
@@ -0,0 +1,108 @@
+"""Latency/throughput benchmark replaying the Postman collection.
+
+    python -m bench --sizes 100,10000 --modes in-process,waitress
+    python -m bench --save-baseline          # record bench/baseline.json
+    python -m bench                          # exits 1 on regression vs the baseline
+
+Each table size is seeded into a scratch SQLite database that
+create_app('TestingConfig') is pointed at through TEST_DATABASE_URI.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m bench', description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='100,1000,10000', help='comma separated row counts to seed')
+    parser.add_argument('--modes', default='in-process,waitress', help='in-process, waitress and/or gunicorn')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4, help='client connections in server modes')
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed for the synthetic data')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95/rps change, 0.25 = 25%%')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+
+    scratch = tempfile.mkdtemp(prefix='bench-')
+    database_uri = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    # must be set before config.TestingConfig is imported
+    os.environ['TEST_DATABASE_URI'] = database_uri
+
+    from app import create_app
+    from app.models import db
+    from app.utils.auth import encode_token
+    from .collection import load_scenarios
+    from .runner import Server, run_in_process, run_http, compare
+    from .seed import seed
+
+    app = create_app('TestingConfig')
+    results = {mode: {} for mode in modes}
+    for size in sizes:
+        for mode in modes:
+            # every mode starts from identical data; the write scenarios change it
+            with app.app_context():
+                fixtures = seed(size, args.seed)
+                headers = {"Authorization": "Bearer " + encode_token(fixtures['admin_id'], 'admin')}
+                db.session.remove()
+            scenarios = load_scenarios(app)
+            started = time.perf_counter()
+            if mode == 'in-process':
+                outcome = run_in_process(app, scenarios, fixtures, headers, args.requests, args.warmup)
+            else:
+                with Server(mode, env={'TEST_DATABASE_URI': database_uri}) as server:
+                    outcome = run_http(server.port, scenarios, fixtures, headers,
+                                       args.requests, args.warmup, args.concurrency)
+            results[mode][str(size)] = outcome
+            print(f"{mode} size={size}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "finished_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            fh.write(text + "\n")
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
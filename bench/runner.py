@@ -0,0 +1,173 @@
+"""Drive scenarios in-process or over HTTP and summarize the latencies."""
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, wall_seconds):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if count else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if count else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if count else None,
+        "rps": round(count / wall_seconds, 1) if wall_seconds > 0 else None,
+    }
+
+
+def _is_error(status):
+    return status >= 400
+
+
+def run_in_process(app, scenarios, fixtures, headers, requests, warmup):
+    """Replay each scenario through Flask's test client, one request at a time."""
+    client = app.test_client()
+    results = {}
+    for scenario in scenarios:
+        if scenario.skipped:
+            results[scenario.name] = {"skipped": scenario.skipped}
+            continue
+        for _ in range(warmup):
+            path, body = scenario.next_request(fixtures)
+            client.open(path, method=scenario.method, json=body, headers=headers).close()
+
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            path, body = scenario.next_request(fixtures)
+            t0 = time.perf_counter()
+            response = client.open(path, method=scenario.method, json=body, headers=headers)
+            response.get_data()
+            latencies.append(time.perf_counter() - t0)
+            errors += _is_error(response.status_code)
+            response.close()
+        results[scenario.name] = summarize(latencies, errors, time.perf_counter() - started)
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A waitress or gunicorn process serving create_app('TestingConfig')."""
+
+    def __init__(self, kind='waitress', workers=2, threads=8, env=None):
+        self.kind = kind
+        self.workers = workers
+        self.threads = threads
+        self.env = env or {}
+        self.port = _free_port()
+        self.process = None
+
+    def __enter__(self):
+        address = f"127.0.0.1:{self.port}"
+        if self.kind == 'gunicorn':
+            cmd = [sys.executable, '-m', 'gunicorn', '-b', address, '-w', str(self.workers),
+                   '--threads', str(self.threads), '--log-level', 'warning', 'bench.server:create()']
+        else:
+            cmd = [sys.executable, '-m', 'waitress', f'--listen={address}', f'--threads={self.threads}',
+                   '--call', 'bench.server:create']
+        self.process = subprocess.Popen(cmd, cwd=ROOT, env={**os.environ, **self.env},
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.kind} exited: {self.process.stderr.read().decode()[-2000:]}")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"{self.kind} did not start listening on {address}")
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def run_http(port, scenarios, fixtures, headers, requests, warmup, concurrency):
+    """Replay each scenario over HTTP with ``concurrency`` keep-alive connections."""
+    local = threading.local()
+    lock = threading.Lock()
+
+    def connection():
+        if getattr(local, 'conn', None) is None:
+            local.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        return local.conn
+
+    def send(scenario):
+        with lock:  # next_request keeps a per-scenario counter
+            path, body = scenario.next_request(fixtures)
+        payload = None if body is None else json.dumps(body)
+        request_headers = dict(headers, **({"Content-Type": "application/json"} if payload else {}))
+        t0 = time.perf_counter()
+        try:
+            conn = connection()
+            conn.request(scenario.method, path, body=payload, headers=request_headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            status = 599
+        return time.perf_counter() - t0, status
+
+    results = {}
+    with ThreadPoolExecutor(concurrency) as pool:
+        for scenario in scenarios:
+            if scenario.skipped:
+                results[scenario.name] = {"skipped": scenario.skipped}
+                continue
+            list(pool.map(send, [scenario] * warmup))
+            started = time.perf_counter()
+            outcomes = list(pool.map(send, [scenario] * requests))
+            wall = time.perf_counter() - started
+            results[scenario.name] = summarize(
+                [latency for latency, _ in outcomes], sum(_is_error(status) for _, status in outcomes), wall)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """List regressions of p95 latency or throughput beyond ``tolerance`` (0.2 = 20%)."""
+    regressions = []
+    for mode, sizes in baseline.get('results', {}).items():
+        for size, endpoints in sizes.items():
+            for name, base in endpoints.items():
+                current = results.get(mode, {}).get(size, {}).get(name)
+                if not current or 'skipped' in base or 'skipped' in current:
+                    continue
+                if base.get('p95_ms') and current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                    regressions.append(f"{mode} size={size} {name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+                if base.get('rps') and current['rps'] < base['rps'] * (1 - tolerance):
+                    regressions.append(f"{mode} size={size} {name}: rps {base['rps']} -> {current['rps']}")
+                if current['errors'] > base.get('errors', 0):
+                    regressions.append(f"{mode} size={size} {name}: errors {base.get('errors', 0)} -> {current['errors']}")
+    return regressions
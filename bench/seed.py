@@ -0,0 +1,35 @@
+"""Synthetic data for benchmark runs, generated the same way as ``flask seed``."""
+from werkzeug.security import generate_password_hash
+from app.models import User, db
+from app.migrations import upgrade
+from app.seed import seed_database
+
+
+LOGIN_EMAIL = 'bench-admin@example.com'
+LOGIN_PASSWORD = 'bench-password'
+
+
+def seed(size, rng_seed=42, chunk=5000):
+    """Reset the app's database and fill it with ``size`` users and ``size`` messages.
+
+    Returns the fixtures scenarios need: the admin id, login credentials and
+    ids that DELETE requests may consume.
+    """
+    db.drop_all()
+    upgrade(db.engine)
+
+    admin = User(username='bench-admin', email=LOGIN_EMAIL, role='admin',
+                 password=generate_password_hash(LOGIN_PASSWORD, method='pbkdf2:sha256:1000'))
+    db.session.add(admin)
+    db.session.commit()
+
+    seed_database(db.engine, users=size, messages=size, rng_seed=rng_seed, chunk=chunk)
+
+    last_user = admin.id + size
+    return {
+        "admin_id": admin.id,
+        "login_email": LOGIN_EMAIL,
+        "login_password": LOGIN_PASSWORD,
+        # newest synthetic users first, never the admin
+        "delete_ids": list(range(last_user, admin.id, -1)) or [last_user],
+    }
@@ -0,0 +1,7 @@
+"""WSGI entry point for the benchmark's waitress/gunicorn servers."""
+from app import create_app
+
+
+def create():
+    # TEST_DATABASE_URI, set by the harness, points TestingConfig at the seeded database
+    return create_app('TestingConfig')
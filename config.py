@@ -1,25 +1,106 @@
 import os
 
+
+# Applied on every new SQLite connection: WAL lets readers run alongside a
+# writer, NORMAL sync is safe under WAL, and mmap serves reads from the page cache.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
 class DevelopmentConfig():
     
     SQLALCHEMY_DATABASE_URI = 'sqlite:///app.db'
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
     DEBUG = True
-    CACHE_TYPE = 'simpleCache'
+    CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
+    AUTH_TOKEN_CACHE_SIZE = 1024
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 8
+    LOG_LEVEL = 'DEBUG'
+    LOG_SAMPLE_RATE = 1.0
+    SERVER_TIMING = True
+    PROFILING = True
+    PROFILE_SAMPLE_RATE = 0.0  # admins can still send X-Profile: 1
+    SLOW_QUERY_THRESHOLD_MS = 50
+    SCHEMA_AUTO_UPGRADE = True
 
 class ProductionConfig():
   
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI') or 'sqlite:///app.db'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),  # below typical server idle timeouts
+        'pool_pre_ping': True,
+    }
+    # Optional read replica: GET requests read from it while it is within REPLICA_MAX_LAG_SECONDS
+    SQLALCHEMY_BINDS = {'replica': os.getenv('REPLICA_DATABASE_URI')} if os.getenv('REPLICA_DATABASE_URI') else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
     SECRET_KEY = os.getenv('SECRET_KEY') or 'super secret key'
-    CACHE_TYPE = 'simpleCache'
+    CACHE_TYPE = 'SimpleCache'
+    AUTH_TOKEN_CACHE_SIZE = 4096
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+    PASSWORD_HASH_TIMEOUT = 10
+    LOG_LEVEL = os.getenv('LOG_LEVEL') or 'INFO'
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+    # Server-Timing spans show up in browser devtools; off unless asked for
+    SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+    # cProfile a fraction of requests (or admin requests sending X-Profile) into instance/profiles
+    PROFILING = os.getenv('PROFILING', '0') == '1'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0.001'))
+    PROFILE_MAX_FILES = 200
+    # statements slower than this are kept (with their plan) for /diagnostics/slow-queries
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '250'))
+    SLOW_QUERY_LOG_SIZE = 200
+    # gunicorn runs several workers; share histograms through per-worker files
+    METRICS_MULTIPROCESS = True
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    CORS_MAX_AGE = 7200  # Chromium's cap for preflight caching
+    # idle SSE streams park as greenlets on the gevent workers set up in gunicorn.conf.py
+    SSE_HEARTBEAT_SECONDS = 15
+    CHANGE_WATCH_INTERVAL = float(os.getenv('CHANGE_WATCH_INTERVAL', '1.0'))
+    # Set to 0 to have workers only check the version, and migrate in the release step with
+    # flask --app "app:create_app('ProductionConfig')" db-upgrade
+    SCHEMA_AUTO_UPGRADE = os.getenv('SCHEMA_AUTO_UPGRADE', '1') == '1'
     DEBUG = False  # Disable debug in production
     TESTING = False
 
 class TestingConfig():
   
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_church.db'
+    # the benchmark harness points this at a scratch database
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URI') or 'sqlite:///test_church.db'
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
+    TESTING = True
+    DEBUG = True
+    SECRET_KEY = 'test_secret_key'
+    CACHE_TYPE = 'NullCache'
+    CACHE_DEFAULT_TIMEOUT = 0
+    # cheap hashes and no process pool keep the test suite fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    LOG_LEVEL = 'WARNING'
+
+class ReplicaTestingConfig():
+
+    # two SQLite files stand in for a primary and its read replica
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_primary.db'
+    SQLALCHEMY_BINDS = {'replica': 'sqlite:///test_replica.db'}
+    REPLICA_MAX_LAG_SECONDS = 5
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
     TESTING = True
     DEBUG = True
     SECRET_KEY = 'test_secret_key'
-    CACHE_TYPE = 'null'
+    CACHE_TYPE = 'NullCache'
     CACHE_DEFAULT_TIMEOUT = 0
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    LOG_LEVEL = 'WARNING'
@@ -1,16 +1,21 @@
 from app import create_app
 from app.models import db
-from flask_cors import CORS
+from app.migrations import ensure_schema
+from app.utils.auth import token_cache
+from app.utils.metrics import metrics
+from app.utils.cors import CorsPolicy
+from app.utils.timing import server_timing
 from flask import jsonify  
 from flask import request  
 from flask import g  
-from flask import make_response  
 import time  
 import os
+import logging
 import re
 from urllib.parse import urlparse  
 
 app = create_app(os.getenv('FLASK_CONFIG', 'DevelopmentConfig'))
+log = logging.getLogger('app.request')
 
 
 allowed_origins = [
@@ -27,12 +32,15 @@ localhost_regex = re.compile(r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$")
 # plus any explicitly configured origins.
 origins_list = [localhost_regex] + [origin for origin in allowed_origins if origin]
 
-CORS(app, 
-     supports_credentials=True, 
-     resources={r"/*": {"origins": origins_list}},
-     allow_headers=["Content-Type", "Authorization", "X-HTTP-Method-Override"],  # allow override header for clients
-     methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],  # Include PATCH for preflight
-     expose_headers=["Content-Type", "Authorization"])
+# Header values and origin decisions are computed once here, not per response.
+cors = CorsPolicy(
+    origins_list,
+    allow_headers=["Content-Type", "Authorization", "X-HTTP-Method-Override"],  # allow override header for clients
+    methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],  # Include PATCH for preflight
+    expose_headers=["Content-Type", "Authorization", "X-Next-Cursor", "Link"],
+    max_age=app.config.get('CORS_MAX_AGE', 600),  # browsers reuse a preflight this many seconds
+)
+cors.init_app(app)
 
 # Build a set of frontend hostnames parsed from allowed_origins to compare against incoming Host/Origin.
 _frontend_hosts = set()
@@ -64,12 +72,14 @@ def _log_and_check_request():
         # Only allow safe override values
         if override_up in ("PUT", "PATCH", "DELETE"):
             request.environ['REQUEST_METHOD'] = override_up
-            # small debug print to show override was applied
-            print(f"[method-override] applied override -> {override_up}")
+            # small debug line to show override was applied
+            log.debug("method override applied", extra={"fields": {"method": override_up}})
     
     host = request.host
     origin = request.headers.get("Origin", "")
-    print(f"[incoming] host={host} origin={origin} method={request.method} path={request.path}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("incoming", extra={"sampled": True, "fields": {
+            "host": host, "origin": origin, "method": request.method, "path": request.path}})
 
     # If a user-related POST/PUT is received and the Host or Origin matches known frontend hosts,
     # return a clear JSON error so developers see the misconfiguration quickly.
@@ -95,7 +105,12 @@ def _log_and_check_request():
 # Add a small health endpoint to verify the backend URL quickly
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "ok"}), 200
+    return jsonify({"status": "ok", "auth_token_cache": token_cache.stats()}), 200
+
+# Prometheus scrape endpoint; sums histograms across all gunicorn workers
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Improve 405 responses so clients see a JSON message (helps during debugging)
 @app.errorhandler(405)
@@ -105,21 +120,6 @@ def method_not_allowed(e):
         "message": "The requested URL exists but does not allow that HTTP method. Verify the frontend is using the correct API base URL and HTTP verb."
     }), 405
 
-# Ensure OPTIONS preflight for user endpoints returns required CORS headers.
-@app.route('/users', methods=['OPTIONS'])
-@app.route('/users/<int:user_id>', methods=['OPTIONS'])
-@app.route('/users/<int:user_id>/role', methods=['OPTIONS'])  # Add this line
-def users_options(user_id=None):
-    # Minimal preflight response — after_request will merge headers too, but return explicit values here
-    resp = make_response("", 200)
-    resp.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-    resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-HTTP-Method-Override"
-    origin = request.headers.get("Origin")
-    # Echo origin for credentialed requests, fallback to wildcard if not present
-    resp.headers["Access-Control-Allow-Origin"] = origin if origin else "*"
-    resp.headers["Access-Control-Allow-Credentials"] = "true"
-    return resp
-
 # Provide a clear, deterministic response when PATCH is requested but not implemented.
 @app.route('/users/<int:user_id>', methods=['PATCH'])
 def users_patch(user_id):
@@ -131,57 +131,41 @@ def users_patch(user_id):
 # Minimal timing/logging: record start time in before_request and log response details in after_request.
 @app.before_request
 def _start_timer():
-    g._start_time = time.time()
+    g._start_time = time.perf_counter()
+    metrics.request_started()
 
 @app.after_request
 def _log_response(response):
-	# Ensure required CORS response headers are present/merged so preflight succeeds
-	# required headers and methods we want to guarantee
-	_required_headers = ["Content-Type", "Authorization", "X-HTTP-Method-Override"]
-	_required_methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
-
-	# Merge/ensure Access-Control-Allow-Headers
-	existing_headers = response.headers.get("Access-Control-Allow-Headers")
-	if existing_headers:
-		existing_list = [h.strip() for h in existing_headers.split(",") if h.strip()]
-		for h in _required_headers:
-			if h not in existing_list:
-				existing_list.append(h)
-		response.headers["Access-Control-Allow-Headers"] = ", ".join(existing_list)
-	else:
-		response.headers["Access-Control-Allow-Headers"] = ", ".join(_required_headers)
-
-	# Merge/ensure Access-Control-Allow-Methods
-	existing_methods = response.headers.get("Access-Control-Allow-Methods")
-	if existing_methods:
-		existing_m_list = [m.strip().upper() for m in existing_methods.split(",") if m.strip()]
-		for m in _required_methods:
-			if m not in existing_m_list:
-				existing_m_list.append(m)
-		response.headers["Access-Control-Allow-Methods"] = ", ".join(existing_m_list)
-	else:
-		response.headers["Access-Control-Allow-Methods"] = ", ".join(_required_methods)
-
-	# Ensure Access-Control-Allow-Origin is set for credentialed requests (echo Origin when available)
-	if not response.headers.get("Access-Control-Allow-Origin"):
-		origin = request.headers.get("Origin")
-		if origin:
-			response.headers["Access-Control-Allow-Origin"] = origin
+	# CORS headers come from the precompiled policy (preflights were answered in before_request)
+	cors.add_headers(response)
 
 	# Compute elapsed time for logging (existing behavior)
 	start = getattr(g, "_start_time", None)
 	elapsed_ms = None
 	if start:
-		elapsed_ms = int((time.time() - start) * 1000)
+		elapsed = time.perf_counter() - start
+		elapsed_ms = int(elapsed * 1000)
+		metrics.observe(request.endpoint, response.status_code, elapsed)
 
 	cors_header = response.headers.get("Access-Control-Allow-Origin", None)
-	print(f"[response] method={request.method} path={request.path} status={response.status_code} elapsed_ms={elapsed_ms} cors_allow_origin={cors_header}")
+	log.info("response", extra={"sampled": True, "fields": {
+		"method": request.method,
+		"path": request.path,
+		"status": response.status_code,
+		"elapsed_ms": elapsed_ms,
+		"cors_allow_origin": cors_header,
+		"timing_ms": server_timing.summary(),
+	}})
 
 	return response
 
+# One cheap schema_version read instead of reflecting the whole schema on every
+# worker start; run `flask db-upgrade` to migrate.
+_schema_started = time.perf_counter()
 with app.app_context():
-    # db.drop_all()  for testing
-    db.create_all()
+    ensure_schema(app)
+app.extensions['startup_timings']['schema_check_ms'] = round((time.perf_counter() - _schema_started) * 1000, 1)
+logging.getLogger('app.startup').info("startup", extra={"fields": app.extensions['startup_timings']})
 
 if __name__ == '__main__':
     app.run()
\ No newline at end of file
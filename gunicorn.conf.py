@@ -0,0 +1,22 @@
+"""Gunicorn settings, picked up automatically from the working directory.
+
+Workers are gevent: an open /pastor-messages/active/stream is a parked
+greenlet rather than a blocked thread, so one worker keeps many subscribers
+and still answers everything else. The worker timeout is a heartbeat from
+the worker's own loop, so long-lived streams do not trip it.
+"""
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+# concurrent requests (open streams included) per worker
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# open streams only end at their next heartbeat; clients reconnect if cut off
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+
+def post_fork(server, worker):
+    if server.cfg.worker_class_str == 'gevent':
+        # psycopg2 waits on sockets in C; yield to the gevent hub instead
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
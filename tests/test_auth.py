@@ -0,0 +1,73 @@
+from app import create_app
+from app.models import User, db
+import unittest
+import time
+from werkzeug.security import generate_password_hash
+from app.utils.auth import encode_token, token_cache, VerifiedTokenCache
+
+
+class TestAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        token_cache.clear()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            user = User(
+                username="member",
+                email="member@email.com",
+                password=generate_password_hash('member123'),
+                role="user"
+            )
+            db.session.add(user)
+            db.session.commit()
+            self.user_token = encode_token(user.id, "user")
+
+    def test_malformed_authorization_header(self):
+        """Test that a header without a bearer token is a 401, not a crash"""
+        for header in ("Bearer", "Bearer a b", "Basic abc"):
+            response = self.client.get('/users', headers={"Authorization": header})
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('message', response.json)
+
+    def test_repeated_token_hits_cache(self):
+        """Test that the second request with the same token skips jwt.decode"""
+        headers = {"Authorization": "Bearer " + self.user_token}
+        self.client.get('/users', headers=headers)
+        self.client.get('/users', headers=headers)
+
+        stats = token_cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_non_admin_cached_token_still_rejected_for_admin_routes(self):
+        """Test that a cached token keeps its role check"""
+        headers = {"Authorization": "Bearer " + self.user_token}
+        self.client.get('/users', headers=headers)
+        response = self.client.get('/pastor-messages', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_token(self):
+        response = self.client.get('/users', headers={"Authorization": "Bearer not.a.jwt"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_cache_evicts_expired_and_least_recent(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        cache.put("expired", time.time() - 1, 1, "user")
+        self.assertIsNone(cache.get("expired"))
+
+        later = time.time() + 60
+        cache.put("a", later, 1, "user")
+        cache.put("b", later, 2, "user")
+        cache.get("a")
+        cache.put("c", later, 3, "admin")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), (1, "user"))
+        self.assertEqual(cache.get("c"), (3, "admin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
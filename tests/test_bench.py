@@ -0,0 +1,40 @@
+import unittest
+from app import create_app
+from app.models import db
+from app.utils.auth import encode_token
+from bench.collection import load_scenarios
+from bench.runner import run_in_process, compare, percentile
+from bench.seed import seed
+
+
+class TestBench(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+
+    def test_replays_collection_in_process(self):
+        with self.app.app_context():
+            fixtures = seed(20)
+            headers = {"Authorization": "Bearer " + encode_token(fixtures['admin_id'], 'admin')}
+            db.session.remove()
+        scenarios = load_scenarios(self.app)
+        names = [s.name for s in scenarios]
+        self.assertIn("POST /users/login", names)
+        self.assertEqual(next(s for s in scenarios if s.name == "PUT /users").skipped, "MethodNotAllowed")
+
+        results = run_in_process(self.app, scenarios, fixtures, headers, requests=5, warmup=1)
+        for name in ("GET /users", "POST /users", "DELETE /users/<id>", "POST /users/login"):
+            self.assertEqual(results[name]['requests'], 5)
+            self.assertEqual(results[name]['errors'], 0, name)
+
+    def test_compare_flags_regressions(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        baseline = {"results": {"in-process": {"100": {"GET /users": {"p95_ms": 10.0, "rps": 100.0, "errors": 0}}}}}
+        ok = {"in-process": {"100": {"GET /users": {"p95_ms": 11.0, "rps": 95.0, "errors": 0}}}}
+        slow = {"in-process": {"100": {"GET /users": {"p95_ms": 20.0, "rps": 95.0, "errors": 0}}}}
+        self.assertEqual(compare(ok, baseline, 0.25), [])
+        self.assertEqual(len(compare(slow, baseline, 0.25)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
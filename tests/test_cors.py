@@ -0,0 +1,52 @@
+import re
+import unittest
+from flask import Flask
+from app.utils.cors import CorsPolicy
+
+
+class TestCorsPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = CorsPolicy(
+            [re.compile(r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$"), "https://grace-lutheran.vercel.app"],
+            allow_headers=["Content-Type", "Authorization"],
+            methods=["GET", "PUT"],
+            expose_headers=["X-Next-Cursor"],
+            max_age=600,
+        )
+        self.app = Flask(__name__)
+        self.policy.init_app(self.app)
+        self.app.after_request(self.policy.add_headers)
+
+        @self.app.route('/thing', methods=['GET', 'PUT'])
+        def thing():
+            return "ok"
+
+        self.client = self.app.test_client()
+
+    def test_preflight_answered_with_max_age(self):
+        response = self.client.options('/thing', headers={
+            "Origin": "http://localhost:5173", "Access-Control-Request-Method": "PUT"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Access-Control-Allow-Origin"], "http://localhost:5173")
+        self.assertEqual(response.headers["Access-Control-Allow-Methods"], "GET, PUT")
+        self.assertEqual(response.headers["Access-Control-Max-Age"], "600")
+
+    def test_disallowed_origin_gets_no_cors_headers(self):
+        response = self.client.get('/thing', headers={"Origin": "https://example.com"})
+        self.assertNotIn("Access-Control-Allow-Origin", response.headers)
+        self.assertIn("Origin", response.headers["Vary"])
+        # without an Origin the response still depends on it
+        self.assertIn("Origin", self.client.get('/thing').headers["Vary"])
+
+    def test_origin_decision_is_memoized(self):
+        for _ in range(3):
+            response = self.client.get('/thing', headers={"Origin": "https://grace-lutheran.vercel.app"})
+        self.assertEqual(response.headers["Access-Control-Expose-Headers"], "X-Next-Cursor")
+        self.assertIn("Origin", response.headers["Vary"])
+        info = self.policy.is_allowed.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+from app import create_app
+from app.models import db
+from app.utils.db import pool_stats, TimedQueuePool
+from app.migrations import SCHEMA_VERSION, current_version, ensure_schema, upgrade
+from sqlalchemy import text
+import unittest
+
+
+class TestDatabaseEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+
+    def test_sqlite_pragmas_applied(self):
+        with self.app.app_context():
+            self.assertEqual(db.session.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(db.session.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+            self.assertEqual(db.session.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+
+    def test_pool_reports_checkout_stats(self):
+        with self.app.app_context():
+            self.assertIsInstance(db.engine.pool, TimedQueuePool)
+            db.session.execute(text("SELECT 1"))
+            stats = db.engine.pool.stats()
+            self.assertGreaterEqual(stats['checkouts'], 1)
+            self.assertEqual(stats['checked_out'], 1)
+            db.session.remove()
+        self.assertTrue(any(s['checkouts'] for s in pool_stats()))
+
+    def test_schema_version_check_and_upgrade(self):
+        with self.app.app_context():
+            db.drop_all()
+            self.assertIsNone(current_version(db.engine))
+
+            self.app.config['SCHEMA_AUTO_UPGRADE'] = False
+            with self.assertRaises(RuntimeError):
+                ensure_schema(self.app)
+
+            self.assertEqual(len(upgrade(db.engine)), SCHEMA_VERSION)
+            self.assertEqual(current_version(db.engine), SCHEMA_VERSION)
+            self.assertEqual(upgrade(db.engine), [])
+            self.assertEqual(ensure_schema(self.app), SCHEMA_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import json
+import logging
+import unittest
+from app.utils.log import JsonFormatter, SampleFilter
+
+
+def _record(level=logging.INFO, **extra):
+    record = logging.LogRecord('app.request', level, __file__, 1, "response", None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogging(unittest.TestCase):
+
+    def test_json_line_carries_fields(self):
+        record = _record(fields={"method": "GET", "path": "/health", "status": 200,
+                                 "elapsed_ms": 3, "cors_allow_origin": None})
+        line = json.loads(JsonFormatter().format(record))
+        self.assertEqual(line['msg'], "response")
+        self.assertEqual(line['status'], 200)
+        self.assertIsNone(line['cors_allow_origin'])
+
+    def test_sampling_only_drops_sampled_records(self):
+        drop_all = SampleFilter(0.0)
+        self.assertFalse(drop_all.filter(_record(sampled=True)))
+        self.assertTrue(drop_all.filter(_record()))
+        self.assertTrue(drop_all.filter(_record(level=logging.ERROR, sampled=True)))
+        self.assertTrue(SampleFilter(1.0).filter(_record(sampled=True)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from app.utils.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+    def test_histogram_buckets_are_cumulative(self):
+        for seconds in (0.05, 0.5, 5.0):
+            self.registry.request_started()
+            self.registry.observe('users_bp.get_users', 200, seconds)
+
+        text = self.registry.render()
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="users_bp.get_users",status="2xx",le="0.1"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="users_bp.get_users",status="2xx",le="1.0"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="users_bp.get_users",status="2xx",le="+Inf"} 3', text)
+        self.assertIn('http_requests_total{endpoint="users_bp.get_users",status="2xx"} 3', text)
+        self.assertIn('http_requests_in_flight 0', text)
+
+    def test_aggregates_other_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.registry.directory = directory
+            self.registry.request_started()
+            self.registry.observe('health', 200, 0.01)
+
+            # a sibling worker that is still running (our parent stands in for it)
+            other = {"pid": os.getppid(), "in_flight": 2, "collected": {},
+                     "histograms": [["health", "2xx", 3, 0, 0, 0.3]]}
+            with open(os.path.join(directory, f"metrics_{os.getppid()}.json"), "w") as fh:
+                json.dump(other, fh)
+
+            text = self.registry.render()
+        self.assertIn('http_requests_total{endpoint="health",status="2xx"} 4', text)
+        self.assertIn('http_requests_in_flight 2', text)
+
+    def test_exited_workers_keep_counting(self):
+        self.registry.add_collector('jobs_total', 'counter', 'Jobs.', lambda: 1)
+        self.registry.add_collector('pool_checked_out', 'gauge', 'Pool.', lambda: 1)
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            self.registry.directory = directory
+            dead = {"pid": process.pid, "in_flight": 1, "collected": {"jobs_total": 5, "pool_checked_out": 3},
+                    "histograms": [["health", "2xx", 3, 0, 0, 0.3]]}
+            dead_path = os.path.join(directory, f"metrics_{process.pid}.json")
+            with open(dead_path, "w") as fh:
+                json.dump(dead, fh)
+
+            for _ in range(2):
+                text = self.registry.render()
+                self.assertIn('http_requests_total{endpoint="health",status="2xx"} 3', text)
+                self.assertIn('jobs_total 6', text)
+                self.assertIn('pool_checked_out 1', text)
+                self.assertIn('http_requests_in_flight 0', text)
+            self.assertFalse(os.path.exists(dead_path))
+
+            # a new worker reusing a pid folds the old file in before overwriting it
+            own_path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+            with open(own_path, "w") as fh:
+                json.dump(dict(dead, pid=os.getpid()), fh)
+            self.registry.flush()
+            text = self.registry.render()
+        self.assertIn('http_requests_total{endpoint="health",status="2xx"} 6', text)
+        self.assertIn('jobs_total 11', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
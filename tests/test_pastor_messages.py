@@ -3,6 +3,17 @@ from app.models import User, PastorMessage, db
 import unittest
 from werkzeug.security import generate_password_hash
 from app.utils.auth import encode_token
+from app.extensions import cache
+from app.migrations import upgrade
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from app.blueprints.pastor_messages.timeline import Timeline
+from bench.runner import Server
+from sqlalchemy import create_engine
+import http.client
+import importlib.util
+import os
+import tempfile
 
 
 class TestPastorMessages(unittest.TestCase):
@@ -202,6 +213,340 @@ class TestPastorMessages(unittest.TestCase):
             self.assertEqual(len(active_messages), 1)
             self.assertEqual(active_messages[0].title, "New Active Message")
 
+    def test_get_active_message_etag_not_modified(self):
+        """Test that a matching If-None-Match returns 304 without a body"""
+        with self.app.app_context():
+            msg = PastorMessage(title="Cached", message="Cache me", is_active=True)
+            db.session.add(msg)
+            db.session.commit()
+
+        response = self.client.get('/pastor-messages/active')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get('ETag')
+        self.assertIsNotNone(etag)
+        self.assertFalse(etag.startswith('W/'))
+
+        response = self.client.get('/pastor-messages/active', headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+    def test_active_message_cache_invalidated_on_activate(self):
+        """Test that activating a message replaces the cached active message"""
+        cache.init_app(self.app, config={'CACHE_TYPE': 'SimpleCache'})
+        with self.app.app_context():
+            msg1 = PastorMessage(title="Message 1", message="Content 1", is_active=True)
+            msg2 = PastorMessage(title="Message 2", message="Content 2", is_active=False)
+            db.session.add_all([msg1, msg2])
+            db.session.commit()
+            msg2_id = msg2.id
+
+        first = self.client.get('/pastor-messages/active')
+        self.assertEqual(first.json['title'], "Message 1")
+
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        self.client.patch(f'/pastor-messages/{msg2_id}/activate', headers=headers)
+
+        second = self.client.get('/pastor-messages/active', headers={"If-None-Match": first.headers['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json['title'], "Message 2")
+
+    def test_database_allows_only_one_active_message(self):
+        """Test that the partial unique index rejects a second active row"""
+        with self.app.app_context():
+            db.session.add(PastorMessage(title="First", message="One", is_active=True))
+            db.session.commit()
+            db.session.add(PastorMessage(title="Second", message="Two", is_active=True))
+            with self.assertRaises(IntegrityError):
+                db.session.commit()
+            db.session.rollback()
+
+    def test_create_message_defaults_to_active(self):
+        """Test that omitting is_active still leaves exactly one active message"""
+        with self.app.app_context():
+            db.session.add(PastorMessage(title="Old", message="Old", is_active=True))
+            db.session.commit()
+
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.post('/pastor-messages', json={"title": "New", "message": "New"}, headers=headers)
+
+        self.assertEqual(response.status_code, 201)
+        with self.app.app_context():
+            active_messages = db.session.query(PastorMessage).filter_by(is_active=True).all()
+            self.assertEqual([m.title for m in active_messages], ["New"])
+
+    def test_upgrade_keeps_newest_active_message(self):
+        """Test that the migration repairs databases with several active rows"""
+        with self.app.app_context():
+            db.drop_all()
+            PastorMessage.__table__.create(db.engine)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql("DROP INDEX uq_pastor_messages_active")
+                conn.execute(PastorMessage.__table__.insert(), [
+                    {"title": "A", "message": "a", "is_active": True},
+                    {"title": "B", "message": "b", "is_active": True},
+                ])
+
+            upgrade(db.engine)
+            upgrade(db.engine)
+
+            active_messages = db.session.query(PastorMessage).filter_by(is_active=True).all()
+            self.assertEqual([m.title for m in active_messages], ["B"])
+
+    def test_get_all_messages_paginates_by_cursor(self):
+        """Test that ?limit= and the next cursor walk the archive in id order"""
+        with self.app.app_context():
+            for i in range(3):
+                db.session.add(PastorMessage(title=f"Message {i}", message="Content", is_active=False))
+            db.session.commit()
+
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        first = self.client.get('/pastor-messages?limit=2', headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([m['title'] for m in first.json], ["Message 0", "Message 1"])
+        cursor = first.headers['X-Next-Cursor']
+
+        second = self.client.get(f'/pastor-messages?limit=2&after={cursor}', headers=headers)
+        self.assertEqual([m['title'] for m in second.json], ["Message 2"])
+        self.assertNotIn('X-Next-Cursor', second.headers)
+
+        bad = self.client.get('/pastor-messages?after=not-a-cursor', headers=headers)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_export_messages_as_csv(self):
+        """Test that the archive export streams CSV when asked for it"""
+        with self.app.app_context():
+            db.session.add(PastorMessage(title="Advent", message="Prepare, the way", is_active=False))
+            db.session.commit()
+
+        headers = {"Authorization": "Bearer " + self.admin_token, "Accept": "text/csv"}
+        response = self.client.get('/pastor-messages/export', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], "id,title,message,is_active")
+        self.assertIn('"Prepare, the way"', lines[1])
+
+    def test_get_all_messages_sparse_fields(self):
+        """Test that ?fields= trims each message to the requested keys"""
+        with self.app.app_context():
+            db.session.add(PastorMessage(title="Only title", message="Long body", is_active=False))
+            db.session.commit()
+
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/pastor-messages?fields=title,is_active', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{"title": "Only title", "is_active": False}])
+
+    def test_active_message_stream_pushes_changes(self):
+        """Test that the SSE stream sends the current message, then each new one"""
+        with self.app.app_context():
+            msg1 = PastorMessage(title="Message 1", message="Content 1", is_active=True)
+            msg2 = PastorMessage(title="Message 2", message="Content 2", is_active=False)
+            db.session.add_all([msg1, msg2])
+            db.session.commit()
+            msg2_id = msg2.id
+
+        response = self.client.get('/pastor-messages/active/stream', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = iter(response.response)
+
+        first = next(events)
+        first = first.decode() if isinstance(first, bytes) else first
+        self.assertTrue(first.startswith("event: active-message\n"))
+        self.assertIn('"Message 1"', first)
+
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        self.client.patch(f'/pastor-messages/{msg2_id}/activate', headers=headers)
+
+        second = next(events)
+        second = second.decode() if isinstance(second, bytes) else second
+        self.assertIn('"Message 2"', second)
+        response.close()
+
+    def test_search_messages_ranked_and_highlighted(self):
+        """Test that search finds indexed messages, best match first, and pages through them"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        for title, body in [("Easter joy", "He is risen"), ("Advent", "Joy to the world, joy everywhere"), ("Lent", "Fasting")]:
+            self.client.post('/pastor-messages', json={"title": title, "message": body, "is_active": False}, headers=headers)
+
+        response = self.client.get('/pastor-messages/search?q=joy&limit=1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertEqual(response.json[0]['highlight'], "Easter <mark>joy</mark>")
+        cursor = response.headers['X-Next-Cursor']
+
+        second = self.client.get(f'/pastor-messages/search?q=joy&limit=1&after={cursor}', headers=headers)
+        self.assertEqual(second.json[0]['title'], "Advent")
+        self.assertIn("<mark>Joy</mark>", second.json[0]['snippet'])
+        self.assertIs(second.json[0]['is_active'], False)
+        self.assertNotIn('X-Next-Cursor', second.headers)
+
+    def test_search_escapes_message_text(self):
+        """Test that highlights mark matches without passing the message's own markup through"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        self.client.post('/pastor-messages', json={"title": "<script>joy</script>", "message": "Bread & <b>joy</b>"}, headers=headers)
+
+        result = self.client.get('/pastor-messages/search?q=joy', headers=headers).json[0]
+        self.assertEqual(result['highlight'], "&lt;script&gt;<mark>joy</mark>&lt;/script&gt;")
+        self.assertEqual(result['snippet'], "Bread &amp; &lt;b&gt;<mark>joy</mark>&lt;/b&gt;")
+        self.assertIs(result['is_active'], True)
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test that edits and deletes through the routes keep the index current"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        created = self.client.post('/pastor-messages', json={"title": "Harvest", "message": "Thanks"}, headers=headers)
+        message_id = created.json['data']['id']
+
+        self.client.put(f'/pastor-messages/{message_id}', json={"title": "Pentecost"}, headers=headers)
+        self.assertEqual(self.client.get('/pastor-messages/search?q=harvest', headers=headers).json, [])
+        self.assertEqual(len(self.client.get('/pastor-messages/search?q=pentecost', headers=headers).json), 1)
+
+        self.client.delete(f'/pastor-messages/{message_id}', headers=headers)
+        self.assertEqual(self.client.get('/pastor-messages/search?q=pentecost', headers=headers).json, [])
+
+        bad = self.client.get('/pastor-messages/search?q=%22%2A', headers=headers)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_scheduled_message_goes_live_without_a_write(self):
+        """Test that a message inside its publish window wins over the is_active one"""
+        now = datetime.utcnow()
+        with self.app.app_context():
+            db.session.add(PastorMessage(title="Weekday", message="Fallback", is_active=True))
+            db.session.add(PastorMessage(title="Sunday", message="Scheduled", is_active=False,
+                                         publish_at=now - timedelta(hours=1), expire_at=now + timedelta(hours=1)))
+            db.session.add(PastorMessage(title="Next week", message="Later", is_active=False,
+                                         publish_at=now + timedelta(days=7)))
+            db.session.commit()
+
+        response = self.client.get('/pastor-messages/active')
+        self.assertEqual(response.json['title'], "Sunday")
+
+        timeline = self.app.extensions['pastor_message_timeline']
+        self.assertIsNone(timeline.at(now + timedelta(hours=2)))
+        self.assertIn(b'"Next week"', timeline.at(now + timedelta(days=8))[1])
+
+    def test_schedule_follows_writes(self):
+        """Test that creating and deleting a scheduled message updates the timeline"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        publish_at = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+        created = self.client.post('/pastor-messages', json={"title": "Vespers", "message": "Tonight", "publish_at": publish_at}, headers=headers)
+        self.assertEqual(created.status_code, 201)
+        self.assertFalse(created.json['data']['is_active'])
+        self.assertEqual(self.client.get('/pastor-messages/active').json['title'], "Vespers")
+
+        message_id = created.json['data']['id']
+        bad = self.client.put(f'/pastor-messages/{message_id}', json={"expire_at": publish_at}, headers=headers)
+        self.assertEqual(bad.status_code, 400)
+
+        self.client.delete(f'/pastor-messages/{message_id}', headers=headers)
+        self.assertEqual(self.client.get('/pastor-messages/active').status_code, 404)
+
+    def test_timeline_prefers_latest_publish_at(self):
+        """Test that overlapping windows resolve to the most recently published one"""
+        t = datetime(2026, 1, 4)
+        timeline = Timeline()
+        timeline.replace([(1, t, t + timedelta(days=7), "long"), (2, t + timedelta(days=1), t + timedelta(days=2), "short")])
+
+        self.assertIsNone(timeline.at(t - timedelta(seconds=1)))
+        self.assertEqual(timeline.at(t), "long")
+        self.assertEqual(timeline.at(t + timedelta(days=1, hours=1)), "short")
+        self.assertEqual(timeline.at(t + timedelta(days=3)), "long")
+        self.assertEqual(timeline.next_boundary(t), t + timedelta(days=1))
+        timeline.remove(2)
+        self.assertEqual(timeline.at(t + timedelta(days=1, hours=1)), "long")
+
+    def test_activation_ends_a_live_schedule(self):
+        """Test that activating a message takes over from an open-ended scheduled one"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        publish_at = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+        scheduled = self.client.post('/pastor-messages', json={"title": "S", "message": "s", "publish_at": publish_at}, headers=headers)
+        manual = self.client.post('/pastor-messages', json={"title": "T", "message": "t", "is_active": False}, headers=headers)
+        self.assertEqual(self.client.get('/pastor-messages/active').json['title'], "S")
+
+        response = self.client.patch(f"/pastor-messages/{manual.json['data']['id']}/activate", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        active = self.client.get('/pastor-messages/active').json
+        self.assertEqual(active['title'], "T")
+        self.assertTrue(active['is_active'])
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(PastorMessage, scheduled.json['data']['id']).expire_at)
+
+    def test_timeline_prunes_shadowed_windows(self):
+        """Test that windows that can no longer win are dropped"""
+        t = datetime(2026, 1, 4)
+        timeline = Timeline()
+        timeline.replace([(1, t, None, "old"), (2, t + timedelta(days=1), None, "newer"),
+                          (3, t, t + timedelta(days=2), "ended"), (4, t + timedelta(days=9), t + timedelta(days=10), "future")])
+        timeline.prune(t + timedelta(days=3))
+        self.assertEqual(len(timeline), 2)
+        self.assertEqual(timeline.at(t + timedelta(days=3)), "newer")
+        self.assertEqual(timeline.at(t + timedelta(days=9)), "future")
+        self.assertEqual(timeline.at(t + timedelta(days=10)), "newer")
+
+        timeline.upsert(5, t + timedelta(days=4), t + timedelta(days=5), "short")
+        self.assertEqual(timeline.at(t + timedelta(days=4, hours=1)), "short")
+        self.assertEqual(timeline.at(t + timedelta(days=5)), "newer")
+        timeline.upsert(5, t + timedelta(days=6), None, "moved")
+        self.assertEqual(timeline.at(t + timedelta(days=4, hours=1)), "newer")
+        self.assertEqual(timeline.at(t + timedelta(days=10)), "moved")
+
+    def test_list_returns_summaries_and_get_returns_body(self):
+        """Test that the list carries previews only and GET /<id> the full body"""
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        body = "Grace and peace. " * 200
+        created = self.client.post('/pastor-messages', json={"title": "Long", "message": body}, headers=headers)
+        self.assertEqual(created.status_code, 201)
+        message_id = created.json['data']['id']
+
+        listed = self.client.get('/pastor-messages', headers=headers).json
+        self.assertEqual(set(listed[0]), {"id", "title", "is_active", "preview"})
+        self.assertLessEqual(len(listed[0]['preview']), 200)
+        self.assertTrue(listed[0]['preview'].endswith("…"))
+
+        full = self.client.get(f'/pastor-messages/{message_id}', headers=headers)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.json['message'], body)
+
+        self.client.put(f'/pastor-messages/{message_id}', json={"message": "Short now"}, headers=headers)
+        self.assertEqual(self.client.get('/pastor-messages', headers=headers).json[0]['preview'], "Short now")
+        self.assertEqual(self.client.get('/pastor-messages/999', headers=headers).status_code, 404)
+
+
+@unittest.skipUnless(importlib.util.find_spec('gevent') and importlib.util.find_spec('gunicorn'),
+                     "needs gunicorn with gevent")
+class TestStreamWorker(unittest.TestCase):
+
+    def test_one_worker_holds_many_streams(self):
+        """Test that one gunicorn worker keeps many SSE streams open and still serves requests"""
+        uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'streams.db')}"
+        engine = create_engine(uri)
+        upgrade(engine)
+        with engine.begin() as conn:
+            conn.execute(PastorMessage.__table__.insert().values(title="Live", message="Hello", is_active=True))
+        # one worker, one thread: only the gevent worker from gunicorn.conf.py can do this
+        with Server('gunicorn', workers=1, threads=1, env={'TEST_DATABASE_URI': uri, 'GUNICORN_GRACEFUL_TIMEOUT': '1'}) as server:
+            streams = []
+            try:
+                for _ in range(25):
+                    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+                    streams.append(conn)
+                    conn.request('GET', '/pastor-messages/active/stream')
+                    response = conn.getresponse()
+                    self.assertEqual(response.status, 200)
+                    first = response.read1()
+                    self.assertTrue(first.startswith(b"event: active-message\n"))
+                    self.assertIn(b'"Live"', first)
+
+                conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+                conn.request('GET', '/pastor-messages/active')
+                self.assertEqual(conn.getresponse().status, 200)
+                conn.close()
+            finally:
+                for conn in streams:
+                    conn.close()
+
 
 if __name__ == "__main__":
     unittest.main()
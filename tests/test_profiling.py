@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from flask import request
+from app import create_app
+from app.models import User, db
+from app.utils.auth import encode_token, is_admin_request
+from app.utils.profiling import profiler
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            admin = User(username="admin", email="admin@email.com", password="x", role="admin")
+            user = User(username="user", email="user@email.com", password="x", role="user")
+            db.session.add_all([admin, user])
+            db.session.commit()
+            self.admin_headers = {"Authorization": "Bearer " + encode_token(admin.id, "admin")}
+            self.user_headers = {"Authorization": "Bearer " + encode_token(user.id, "user")}
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app.config.update(PROFILING=True, PROFILE_SAMPLE_RATE=0.0, PROFILE_DIR=self.tmp.name)
+        profiler.init_app(self.app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_trigger_header_needs_an_admin_token(self):
+        self.client.get('/pastor-messages/active')
+        self.client.get('/pastor-messages/active', headers={**self.user_headers, "X-Profile": "1"})
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+        self.client.get('/pastor-messages/active', headers={**self.admin_headers, "X-Profile": "1"})
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+
+    def test_admin_check_leaves_the_request_untouched(self):
+        with self.app.test_request_context(headers=self.admin_headers):
+            self.assertTrue(is_admin_request())
+            self.assertFalse(hasattr(request, 'user_id'))
+        with self.app.test_request_context(headers={"Authorization": "Bearer not-a-token"}):
+            self.assertFalse(is_admin_request())
+        with self.app.test_request_context(headers=self.user_headers):
+            self.assertFalse(is_admin_request())
+
+    def test_admin_endpoint_aggregates_per_endpoint(self):
+        for _ in range(2):
+            self.client.get('/pastor-messages/active', headers={**self.admin_headers, "X-Profile": "1"})
+
+        response = self.client.get('/diagnostics/profiles', headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        group = response.json[0]
+        self.assertEqual(group['endpoint'], "pastor_messages.get_active_message")
+        self.assertEqual(group['profiles'], 2)
+        self.assertTrue(group['top'])
+
+        for limit in (0, -1):
+            response = self.client.get(f'/diagnostics/profiles?limit={limit}', headers=self.admin_headers)
+            self.assertEqual(response.status_code, 400)
+
+        download = self.client.get(f"/diagnostics/profiles/{group['files'][0]}", headers=self.admin_headers)
+        self.assertEqual(download.status_code, 200)
+        download.close()
+
+        denied = self.client.get('/diagnostics/profiles', headers=self.user_headers)
+        self.assertEqual(denied.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from app import create_app
+from app.models import User, PastorMessage, db
+from app.extensions import cache
+from app.utils.auth import encode_token
+from app.utils.db import replica_router, replica_lag
+
+
+class TestReplicaRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('ReplicaTestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.primary, self.replica = db.engines[None], db.engines['replica']
+            for engine in (self.primary, self.replica):
+                db.metadata.drop_all(engine)
+                db.metadata.create_all(engine)
+            admin = User(username="admin", email="admin@email.com", password="x", role="admin")
+            db.session.add(admin)
+            db.session.commit()
+            self.headers = {"Authorization": "Bearer " + encode_token(admin.id, "admin")}
+            # the "replica" lags behind: it only has what we put there
+            with self.primary.begin() as conn:
+                conn.execute(PastorMessage.__table__.insert(), [{"title": "On primary", "message": "p", "preview": "p", "is_active": True}])
+            with self.replica.begin() as conn:
+                conn.execute(PastorMessage.__table__.insert(), [{"title": "On replica", "message": "r", "preview": "r", "is_active": True}])
+
+    def tearDown(self):
+        replica_router.probe = replica_lag
+        replica_router.init_app(self.app)
+        # init_app registered an (empty) 'replica' metadata on the shared db;
+        # drop it so apps without the bind can still create_all/drop_all
+        db.metadatas.pop('replica', None)
+
+    def test_get_requests_read_from_the_replica(self):
+        response = self.client.get('/pastor-messages/1', headers=self.headers)
+        self.assertEqual(response.json['title'], "On replica")
+
+    def test_shared_caches_are_filled_from_the_primary(self):
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        self.app.config['CACHE_DEFAULT_TIMEOUT'] = 300
+        cache.init_app(self.app)
+        with self.app.app_context():
+            cache.clear()
+
+        created = self.client.post('/pastor-messages', json={"title": "Fresh", "message": "f"}, headers=self.headers)
+        self.assertEqual(created.status_code, 201)
+        # the replica never sees "Fresh"; neither the cache fill nor the cached copy may come from it
+        for _ in range(2):
+            self.assertEqual(self.client.get('/pastor-messages/active').json['title'], "Fresh")
+
+        scheduled = self.client.post('/pastor-messages', json={
+            "title": "Scheduled", "message": "s", "publish_at": "2020-01-01T00:00:00"}, headers=self.headers)
+        self.assertEqual(scheduled.status_code, 201)
+        self.app.extensions['pastor_message_timeline'].stale = True
+        self.assertEqual(self.client.get('/pastor-messages/active').json['title'], "Scheduled")
+
+    def test_writes_and_read_after_write_use_the_primary(self):
+        created = self.client.post('/pastor-messages', json={"title": "New", "message": "n"}, headers=self.headers)
+        self.assertEqual(created.status_code, 201)
+        with self.primary.connect() as conn:
+            titles = [row.title for row in conn.execute(PastorMessage.__table__.select())]
+        self.assertIn("New", titles)
+
+        with self.app.test_request_context('/pastor-messages', method='GET'):
+            self.assertEqual(db.session.query(PastorMessage).filter_by(is_active=True).one().title, "On replica")
+            db.session.add(PastorMessage(title="Written", message="w", is_active=False))
+            db.session.flush()
+            titles = [m.title for m in db.session.query(PastorMessage).order_by(PastorMessage.id)]
+            self.assertIn("Written", titles)
+            self.assertIn("New", titles)
+            db.session.rollback()
+
+    def test_lagging_replica_falls_back_to_the_primary(self):
+        replica_router.probe = lambda engine: 60.0
+        replica_router.init_app(self.app)
+
+        response = self.client.get('/pastor-messages/active')
+        self.assertEqual(response.json["title"], "On primary")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from app import create_app
+from app.models import User, PastorMessage, db
+
+
+class TestSeedCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.runner = self.app.test_cli_runner()
+
+    def _emails(self):
+        with self.app.app_context():
+            return [u.email for u in db.session.query(User).order_by(User.id)]
+
+    def test_seed_is_deterministic_and_chunked(self):
+        result = self.runner.invoke(args=['seed', '--reset', '--users', '50', '--messages', '10', '--chunk', '20'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("users: 50/50 rows", result.output)
+        first = self._emails()
+
+        self.runner.invoke(args=['seed', '--reset', '--users', '50', '--messages', '10', '--chunk', '7'])
+        self.assertEqual(self._emails(), first)
+        self.assertEqual(len(first), 50)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.query(PastorMessage).count(), 10)
+            self.assertEqual(db.session.query(PastorMessage).filter_by(is_active=True).count(), 1)
+
+    def test_seeded_users_can_log_in(self):
+        self.runner.invoke(args=['seed', '--reset', '--users', '20', '--messages', '0'])
+        email = self._emails()[3]
+        response = self.app.test_client().post('/users/login', json={"email": email, "password": "password3"})
+        self.assertEqual(response.status_code, 200, response.json)
+
+        again = self.runner.invoke(args=['seed', '--users', '5', '--messages', '0'])
+        self.assertEqual(again.exit_code, 0, again.output)
+        self.assertEqual(len(self._emails()), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
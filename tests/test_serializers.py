@@ -0,0 +1,55 @@
+from app import create_app
+from app.models import User, PastorMessage, db
+from app.blueprints.users.schemas import user_schema, users_schema, user_serializer
+from app.blueprints.pastor_messages.schemas import pastor_messages_schema, pastor_message_serializer
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+import unittest
+
+
+class TestSerializers(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([
+                User(username="ann", email="ann@email.com", password="hash", role="admin"),
+                User(username="bob", email="bob@email.com", password="hash"),
+                User(username="Grâce Lindqvist…", email="grace@email.com", password="hash"),
+                User(username="emoji 🙏 \x7f\t", email="emoji@email.com", password="hash"),
+                PastorMessage(title="Easter", message="He is risen", is_active=True),
+                PastorMessage(title="Lent", message="Forty days", is_active=False),
+            ])
+            db.session.commit()
+
+    def test_matches_schema_dump(self):
+        with self.app.app_context():
+            users = db.session.query(User).all()
+            messages = db.session.query(PastorMessage).all()
+            self.assertEqual(user_serializer.dump(users, many=True), users_schema.dump(users))
+            self.assertEqual(pastor_message_serializer.dump(messages, many=True), pastor_messages_schema.dump(messages))
+
+    def test_core_rows_match_schema_dump(self):
+        with self.app.app_context():
+            row = db.session.execute(select(*User.__table__.columns)).first()
+            user = db.session.get(User, row.id)
+            self.assertEqual(user_serializer.dump(row), user_schema.dump(user))
+
+    def test_response_bytes_match_stdlib_jsonify(self):
+        stdlib = DefaultJSONProvider(self.app)
+        with self.app.app_context():
+            users = db.session.query(User).all()
+            for compact in (True, False):
+                self.app.json.compact = stdlib.compact = compact
+                fast = user_serializer.jsonify(users, many=True).get_data()
+                expected = stdlib.response(users_schema.dump(users)).get_data()
+                self.assertEqual(fast, expected)
+                # ints beyond 64 bits go through the stdlib encoder instead of failing
+                payload = {"big": 2 ** 70, "text": "Grâce…"}
+                self.assertEqual(self.app.json.response(payload).get_data(), stdlib.response(payload).get_data())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from app import create_app
+from app.models import User, PastorMessage, db
+from app.utils.auth import encode_token
+from app.utils.slow_queries import slow_queries, normalize_sql, parameter_shape
+
+
+class TestSlowQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            admin = User(username="admin", email="admin@email.com", password="x", role="admin")
+            db.session.add(admin)
+            db.session.add(PastorMessage(title="Hello", message="World", is_active=True))
+            db.session.commit()
+            self.headers = {"Authorization": "Bearer " + encode_token(admin.id, "admin")}
+
+            # record everything
+            self.app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+            slow_queries.init_app(self.app, db.engines.values())
+        slow_queries.clear()
+
+    def test_normalizes_literals_and_placeholder_lists(self):
+        sql = "SELECT *  FROM users\n WHERE id IN (?, ?, ?) AND role = 'admin' LIMIT 50"
+        self.assertEqual(normalize_sql(sql), "SELECT * FROM users WHERE id IN (...) AND role = ? LIMIT ?")
+        self.assertEqual(parameter_shape((1, "a"), False), ["int", "str"])
+        self.assertEqual(parameter_shape([(1,), (2,)], True), {"rows": 2, "each": ["int"]})
+
+    def test_records_endpoint_and_plan(self):
+        self.client.get('/pastor-messages/active')
+
+        response = self.client.get('/diagnostics/slow-queries?endpoint=pastor_messages.get_active_message',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        entries = response.json['entries']
+        self.assertTrue(entries)
+        select_entry = next(e for e in entries if e['statement'].startswith("SELECT"))
+        self.assertIn("pastor_messages", select_entry['statement'])
+        self.assertTrue(any("pastor_messages" in line for line in select_entry['plan']))
+
+        response = self.client.get('/diagnostics/slow-queries?limit=-1', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_explain_leaves_the_transaction_usable(self):
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                conn.execute(PastorMessage.__table__.insert(), {"title": "Draft", "message": "x", "preview": "x", "is_active": False})
+                plan = slow_queries._plan(conn, "SELECT * FROM missing", "SELECT * FROM missing", (), False)
+                self.assertTrue(plan[0].startswith("EXPLAIN failed"))
+                titles = [row.title for row in conn.execute(PastorMessage.__table__.select())]
+                self.assertIn("Draft", titles)
+                conn.rollback()
+
+
+if __name__ == "__main__":
+    unittest.main()
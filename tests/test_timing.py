@@ -0,0 +1,42 @@
+import unittest
+from app import create_app
+from app.models import User, PastorMessage, db
+from app.utils.auth import encode_token
+from app.utils.timing import server_timing
+
+
+class TestServerTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            admin = User(username="admin", email="admin@email.com", password="x", role="admin")
+            db.session.add(admin)
+            db.session.add(PastorMessage(title="Hello", message="World", is_active=False))
+            db.session.commit()
+            self.token = encode_token(admin.id, "admin")
+
+    def _enable(self):
+        self.app.config['SERVER_TIMING'] = True
+        with self.app.app_context():
+            server_timing.init_app(self.app, db.engines.values())
+
+    def test_header_reports_auth_db_and_serialization(self):
+        self._enable()
+        response = self.app.test_client().get('/pastor-messages', headers={"Authorization": "Bearer " + self.token})
+
+        self.assertEqual(response.status_code, 200)
+        header = response.headers['Server-Timing']
+        names = [part.split(';')[0] for part in header.split(', ')]
+        self.assertEqual(set(names), {"auth", "db", "serialize", "total"})
+        self.assertIn('desc="1 queries"', header)
+
+    def test_disabled_by_default(self):
+        response = self.app.test_client().get('/pastor-messages/active')
+        self.assertNotIn('Server-Timing', response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,340 @@
+from app import create_app
+from app.models import User, db
+import unittest
+import json
+from sqlalchemy import event
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.utils.auth import encode_token
+from app.migrations import upgrade
+from app.utils.passwords import hasher, HashingBusy, PasswordHasher
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import threading
+
+class TestUsers(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            self.user = User(
+                username="testuser",
+                email="testuser@email.com",
+                password=generate_password_hash('123'),
+                role="customer"
+            )
+            db.session.add(self.user)
+            db.session.commit()
+            self.user_token = encode_token(self.user.id, "customer")
+            self.mechanic_token = encode_token(self.user.id, "mechanic")
+            self.admin_token = encode_token(self.user.id, "admin")
+
+    def test_create_user(self):
+        user_payload = {
+            "username": "john_doe",
+            "email": "john@email.com",
+            "password": "123",
+            "role": "customer"
+        }
+        response = self.client.post('/users', json=user_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('user', response.json)
+        self.assertEqual(response.json['user']['username'], "john_doe")
+        self.assertEqual(response.json['user']['email'], "john@email.com")
+        self.assertEqual(response.json['user']['role'], "customer")
+
+    def test_invalid_create_user(self):
+        user_payload = {
+            "username": "jane_doe",
+            "email": "invalid-email",
+            "password": "123",
+            "role": "customer"
+        }
+        response = self.client.post('/users', json=user_payload)
+        self.assertIn('email', response.json['errors'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_users_role_access(self):
+        headers = {"Authorization": "Bearer " + self.mechanic_token}
+        response = self.client.get('/users', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_all_users(self):
+        with self.app.app_context():
+            user2 = User(
+                username="alice",
+                email="alice@email.com",
+                password=generate_password_hash('abc'),
+                role="customer"
+            )
+            db.session.add(user2)
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/users', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_users_paginated(self):
+        with self.app.app_context():
+            for name in ("alice", "bob"):
+                db.session.add(User(username=name, email=f"{name}@email.com",
+                                    password=generate_password_hash('abc'), role="customer"))
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/users?limit=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+        cursor = response.headers['X-Next-Cursor']
+        response = self.client.get(f'/users?limit=2&after={cursor}', headers=headers)
+        self.assertEqual([u['username'] for u in response.json], ["bob"])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_update_user_role_access(self):
+        update_payload = {
+            "username": "jane_doe",
+            "email": "TestUser@email.com",
+            "password": "123",
+            "role": "customer"
+        }
+        headers = {"Authorization": "Bearer " + self.user_token}
+        response = self.client.put(f'/users/{self.user.id}', json=update_payload, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['user']['username'], "jane_doe")
+
+        update_payload["email"] = "newemail@email.com"
+        response = self.client.put(f'/users/{self.user.id}', json=update_payload, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_update_user_cannot_change_own_role(self):
+        headers = {"Authorization": "Bearer " + self.user_token}
+        response = self.client.put(f'/users/{self.user.id}', json={"role": "admin"}, headers=headers)
+        self.assertEqual(response.status_code, 403)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(User, self.user.id).role, "customer")
+
+    def test_update_other_user_requires_admin(self):
+        with self.app.app_context():
+            other = User(username="other", email="other@email.com",
+                         password=generate_password_hash('abc'), role="admin")
+            db.session.add(other)
+            db.session.commit()
+            other_id, old_hash = other.id, other.password
+        headers = {"Authorization": "Bearer " + self.user_token}
+        response = self.client.put(f'/users/{other_id}', json={"password": "hijacked"}, headers=headers)
+        self.assertEqual(response.status_code, 403)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(User, other_id).password, old_hash)
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.put(f'/users/{other_id}', json={"username": "renamed"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['user']['username'], "renamed")
+
+    def test_login_user(self):
+        login_creds = {
+            "email": "testuser@email.com",
+            "password": "123"
+        }
+        response = self.client.post('/users/login', json=login_creds)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json)
+        self.assertEqual(response.json['user']['email'], "testuser@email.com")
+
+    def test_login_email_is_case_insensitive(self):
+        response = self.client.post('/users/login', json={"email": "TestUser@Email.com", "password": "123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['user']['email'], "testuser@email.com")
+
+    def test_upgrade_normalizes_existing_emails(self):
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(User.__table__.insert(), [
+                    {"username": "mixed", "email": "Mixed@Email.com ", "password": "x", "role": "customer"},
+                    {"username": "dupe", "email": "TestUser@email.com", "password": "x", "role": "customer"},
+                ])
+            upgrade(db.engine)
+            emails = {u.username: u.email for u in db.session.query(User).all()}
+        self.assertEqual(emails["mixed"], "mixed@email.com")
+        # collides with the existing canonical address, so it is left alone
+        self.assertEqual(emails["dupe"], "TestUser@email.com")
+
+    def test_login_upgrades_password_hash(self):
+        response = self.client.post('/users/login', json={"email": "testuser@email.com", "password": "123"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            user = db.session.query(User).filter_by(email="testuser@email.com").first()
+            self.assertTrue(user.password.startswith("pbkdf2:sha256:1000$"))
+            self.assertTrue(check_password_hash(user.password, "123"))
+
+    def test_create_user_returns_503_when_hashing_saturated(self):
+        hasher.workers = 1
+        hasher._slots.acquire()
+        try:
+            user_payload = {"username": "busy", "email": "busy@email.com", "password": "123", "role": "customer"}
+            response = self.client.post('/users', json=user_payload)
+        finally:
+            hasher._slots.release()
+            hasher.workers = 0
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    def _thread_hasher(self, workers, max_pending, timeout):
+        # a thread pool stands in for the process pool so tests can block jobs
+        pool = PasswordHasher()
+        pool.method, pool.workers, pool.timeout = 'pbkdf2:sha256:1000', workers, timeout
+        pool._slots = threading.BoundedSemaphore(max_pending)
+        pool._executor = ThreadPoolExecutor(workers)
+        self.addCleanup(pool._executor.shutdown)
+        return pool
+
+    def test_timed_out_hash_keeps_its_slot_until_it_finishes(self):
+        pool = self._thread_hasher(workers=1, max_pending=1, timeout=0.05)
+        finish = threading.Event()
+        with self.assertRaises(HashingBusy):
+            pool._run(finish.wait)
+        # the job is still running in the pool, so the queue is still full
+        with self.assertRaises(HashingBusy):
+            pool.hash("pw")
+        finish.set()
+        pool._executor.shutdown(wait=True)
+        self.assertTrue(pool._slots.acquire(blocking=False))
+
+    def test_hash_many_leaves_slots_for_single_hashes(self):
+        pool = self._thread_hasher(workers=2, max_pending=3, timeout=5)
+        pool.chunk_size = 1
+        held = []
+        real_acquire = pool._slots.acquire
+
+        def acquire(*args, **kwargs):
+            acquired = real_acquire(*args, **kwargs)
+            held.append(3 - pool._slots._value)
+            return acquired
+
+        with mock.patch.object(pool._slots, 'acquire', acquire):
+            hashes = pool.hash_many([f"pw{i}" for i in range(10)])
+        self.assertEqual(len(hashes), 10)
+        self.assertTrue(all(check_password_hash(h, f"pw{i}") for i, h in enumerate(hashes)))
+        # never more slots than pool processes, so one stays free for a login
+        self.assertLessEqual(max(held), 2)
+
+    def test_hash_many_times_out_per_chunk(self):
+        pool = self._thread_hasher(workers=1, max_pending=2, timeout=0.05)
+        finish = threading.Event()
+        with mock.patch('app.utils.passwords.generate_password_hash', lambda *args: finish.wait()):
+            with self.assertRaises(HashingBusy):
+                pool.hash_many(["a", "b"])
+        finish.set()
+        pool._executor.shutdown(wait=True)
+        self.assertEqual(pool._slots._value, 2)
+
+    def test_bulk_create_users(self):
+        payload = [
+            {"username": "ann", "email": "Ann@email.com", "password": "pw"},
+            {"username": "bad", "email": "not-an-email", "password": "pw"},
+            {"username": "dupe", "email": "testuser@email.com", "password": "pw"},
+        ]
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.post('/users/bulk', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['created'], 1)
+        statuses = [r['status'] for r in response.json['results']]
+        self.assertEqual(statuses, ["created", "error", "error"])
+        with self.app.app_context():
+            ann = db.session.query(User).filter_by(email="ann@email.com").first()
+            self.assertTrue(check_password_hash(ann.password, "pw"))
+
+    def test_bulk_create_users_ndjson_requires_admin(self):
+        body = '{"username": "nd", "email": "nd@email.com", "password": "pw"}\n'
+        response = self.client.post('/users/bulk', data=body, content_type='application/x-ndjson',
+                                    headers={"Authorization": "Bearer " + self.user_token})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/users/bulk', data=body, content_type='application/x-ndjson',
+                                    headers={"Authorization": "Bearer " + self.admin_token})
+        self.assertEqual(response.json['created'], 1)
+
+    def test_export_users_ndjson(self):
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/users/export', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(rows[0]['email'], "testuser@email.com")
+        self.assertNotIn('password', rows[0])
+
+    def test_get_users_sparse_fields(self):
+        statements = []
+        with self.app.app_context():
+            engine = db.engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            headers = {"Authorization": "Bearer " + self.admin_token}
+            response = self.client.get('/users?fields=id,username', headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{"id": self.user.id, "username": "testuser"}])
+        user_selects = [s for s in statements if "FROM users" in s]
+        self.assertTrue(user_selects)
+        self.assertNotIn("password", user_selects[-1])
+
+    def test_get_user_rejects_unknown_fields(self):
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get(f'/users/{self.user.id}?fields=id,shoe_size', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/users/{self.user.id}?fields=email', headers=headers)
+        self.assertEqual(response.json, {"email": "testuser@email.com"})
+
+    def test_unauthorized_user(self):
+        response = self.client.delete('/users/1')
+        self.assertIn(response.status_code, (401, 405))
+        # If 401, check for message; if 405, skip message check
+        if response.status_code == 401:
+            self.assertIn('message', response.json)
+
+if __name__ == "__main__":
+    unittest.main()
+
+# class TestAdminUserActions(unittest.TestCase):
+#     def setUp(self):
+#         self.app = create_app('TestingConfig')
+#         self.client = self.app.test_client()
+#         with self.app.app_context():
+#             db.drop_all()
+#             db.create_all()
+#             admin = User(
+#                 username="admin",
+#                 email="admin@email.com",
+#                 password=generate_password_hash('adminpass'),
+#                 role="admin"
+#             )
+#             db.session.add(admin)
+#             db.session.commit()
+#             self.admin_token = encode_token(admin.id, "admin")
+#             other = User(
+#                 username="target",
+#                 email="target@email.com",
+#                 password=generate_password_hash('target'),
+#                 role="customer"
+#             )
+#             db.session.add(other)
+#             db.session.commit()
+#             self.other_id = other.id
+
+    # def test_admin_update_user_by_id(self):
+    #     headers = {"Authorization": "Bearer " + self.admin_token}
+    #     payload = {"username": "updated", "role": "mechanic"}
+    #     response = self.client.put(f"/users/{self.other_id}", json=payload, headers=headers)
+    #     self.assertEqual(response.status_code, 200)
+    #     self.assertEqual(response.json['username'], 'updated')
+    #     self.assertEqual(response.json['role'], 'mechanic')
+
+    # def test_admin_delete_user_by_id(self):
+    #     headers = {"Authorization": "Bearer " + self.admin_token}
+    #     response = self.client.delete(f"/users/{self.other_id}", headers=headers)
+    #     self.assertIn(response.status_code, (200,204))
+
+    # def test_admin_cannot_delete_self(self):
+    #     headers = {"Authorization": "Bearer " + self.admin_token}
+    #     response = self.client.delete(f"/users/1", headers=headers)
+    #     self.assertEqual(response.status_code, 403)